@@ -15,6 +15,28 @@
 /*!40101 SET @OLD_SQL_MODE=@@SQL_MODE, SQL_MODE='NO_AUTO_VALUE_ON_ZERO' */;
 /*!40111 SET @OLD_SQL_NOTES=@@SQL_NOTES, SQL_NOTES=0 */;
 
+--
+-- Table structure for table `embedding_jobs`
+--
+
+DROP TABLE IF EXISTS `embedding_jobs`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `embedding_jobs` (
+  `job_key` varchar(64) NOT NULL,
+  `entity` varchar(16) NOT NULL,
+  `ref_id` varchar(64) NOT NULL,
+  `enqueued_at` double NOT NULL,
+  `updated_at` double NOT NULL,
+  `attempts` int NOT NULL DEFAULT '0',
+  `claim` varchar(36) DEFAULT NULL,
+  `claimed_until` double DEFAULT NULL,
+  `last_error` text,
+  PRIMARY KEY (`job_key`),
+  KEY `idx_embedding_jobs_enqueued` (`enqueued_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `enrollments`
 --
@@ -94,6 +116,7 @@ CREATE TABLE `modules` (
   PRIMARY KEY (`module_id`),
   KEY `fk_module_instructor` (`instructor_id`),
   KEY `idx_modules_academic_term` (`academic_term`),
+  FULLTEXT KEY `ft_modules_text` (`module_id`,`module_name`,`description`),
   CONSTRAINT `fk_module_instructor` FOREIGN KEY (`instructor_id`) REFERENCES `instructors` (`instructor_id`) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
@@ -108,6 +131,23 @@ INSERT INTO `modules` VALUES ('AAI1001','Data Engineering and Visualization','Te
 /*!40000 ALTER TABLE `modules` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `module_embeddings`
+--
+
+DROP TABLE IF EXISTS `module_embeddings`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `module_embeddings` (
+  `module_id` varchar(10) NOT NULL,
+  `model_version` varchar(64) NOT NULL,
+  `vector` blob NOT NULL,
+  `updated_at` datetime DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`module_id`,`model_version`),
+  CONSTRAINT `fk_embedding_module` FOREIGN KEY (`module_id`) REFERENCES `modules` (`module_id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `prerequisites`
 --
@@ -135,6 +175,26 @@ INSERT INTO `prerequisites` VALUES ('CSC1108','CSC1103'),('CSC1109','CSC1103'),(
 /*!40000 ALTER TABLE `prerequisites` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `student_recommendations`
+--
+
+DROP TABLE IF EXISTS `student_recommendations`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `student_recommendations` (
+  `student_id` int NOT NULL,
+  `rank` int NOT NULL,
+  `module_id` varchar(10) NOT NULL,
+  `score` float NOT NULL,
+  PRIMARY KEY (`student_id`,`rank`),
+  UNIQUE KEY `uq_recommendation_module` (`student_id`,`module_id`),
+  KEY `fk_recommendation_module` (`module_id`),
+  CONSTRAINT `fk_recommendation_module` FOREIGN KEY (`module_id`) REFERENCES `modules` (`module_id`) ON DELETE CASCADE,
+  CONSTRAINT `fk_recommendation_student` FOREIGN KEY (`student_id`) REFERENCES `students` (`student_id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `students`
 --
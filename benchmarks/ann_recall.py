@@ -0,0 +1,72 @@
+# Recall@10 and latency of the IVF-flat index against exact search, at 10k / 100k / 1M vectors.
+# Vectors are synthetic 384-d clusters (MiniLM's dimension); 1M float32 vectors take ~1.5 GB.
+# Usage: python benchmarks/ann_recall.py [--sizes 10000 100000 1000000] [--nprobe 1 4 8 16 32 64 128]
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from website.services.ann_index import IVFFlatIndex
+
+DIM = 384
+K = 10
+
+def synthetic_vectors(n, dim=DIM, clusters=256, seed=0):
+    # topic-like clusters rather than uniform noise, so the cells mean something;
+    # generated in float32 blocks to keep the 1M case within memory
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim), dtype=np.float32)
+    vectors = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, 100_000):
+        stop = min(n, start + 100_000)
+        block = centres[rng.integers(0, clusters, size=stop - start)]
+        block += 0.6 * rng.standard_normal((stop - start, dim), dtype=np.float32)
+        vectors[start:stop] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    return vectors
+
+def exact_top_k(vectors, queries, k=K):
+    top = np.empty((queries.shape[0], k), dtype=np.int64)
+    for i, query in enumerate(queries):
+        scores = vectors @ query
+        part = np.argpartition(-scores, k - 1)[:k]
+        top[i] = part[np.argsort(-scores[part])]
+    return top
+
+def run(n, nprobes, num_queries):
+    vectors = synthetic_vectors(n)
+    queries = synthetic_vectors(num_queries, seed=1)
+    ids = [str(i) for i in range(n)]
+
+    started = time.perf_counter()
+    exact = exact_top_k(vectors, queries)
+    exact_ms = (time.perf_counter() - started) * 1000 / num_queries
+
+    started = time.perf_counter()
+    index = IVFFlatIndex.build(ids, vectors)
+    build_s = time.perf_counter() - started
+    print(f"\nn={n:,}  nlist={index.nlist}  build {build_s:.1f}s  exact {exact_ms:.2f} ms/query")
+    print(f"{'nprobe':>6} {'recall@10':>10} {'ms/query':>9} {'speed-up':>9}")
+
+    for nprobe in nprobes:
+        hits = 0
+        started = time.perf_counter()
+        for query, expected in zip(queries, exact):
+            found = {int(item_id) for item_id, _ in index.search(query, k=K, nprobe=nprobe)}
+            hits += len(found.intersection(expected.tolist()))
+        ann_ms = (time.perf_counter() - started) * 1000 / num_queries
+        print(f"{nprobe:>6} {hits / (K * num_queries):>10.3f} {ann_ms:>9.2f} {exact_ms / ann_ms:>8.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="IVF-flat recall@10 vs exact search")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64, 128])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        run(n, args.nprobe, args.queries)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# Measures import / create_app() time in a fresh interpreter so startup regressions are visible.
+# Usage: python benchmarks/startup_time.py [--runs 5]
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import sys, time, json
+t0 = time.perf_counter()
+import website
+t1 = time.perf_counter()
+app = website.create_app()
+t2 = time.perf_counter()
+print(json.dumps({
+    "import_website": t1 - t0,
+    "create_app": t2 - t1,
+    "sentence_transformers_imported": "sentence_transformers" in sys.modules,
+    "torch_imported": "torch" in sys.modules,
+}))
+"""
+
+def run_once():
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Import and create_app() time in a fresh interpreter")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    for key in ("import_website", "create_app"):
+        values = sorted(r[key] for r in runs)
+        print(f"{key:<16} median {values[len(values) // 2] * 1000:8.1f} ms   min {values[0] * 1000:8.1f} ms")
+    print(f"sentence_transformers imported at startup: {runs[-1]['sentence_transformers_imported']}")
+    print(f"torch imported at startup:                 {runs[-1]['torch_imported']}")
+    print("For a per-module breakdown run: python -X importtime -c \"import website\"")
+
+if __name__ == '__main__':
+    main()
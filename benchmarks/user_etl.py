@@ -0,0 +1,115 @@
+# Read/write cost of the generate_vectors.py user phase on a synthetic dataset (default 100k users):
+# per-user Student/Instructor lookups vs one outer-joined query streamed with yield_per, and
+# (with --mongo-uri) one insert_one per document vs ordered bulk_write batches.
+# Usage: python benchmarks/user_etl.py [--users 100000] [--read-batch-size 1000] [--write-batch-size 1000] [--mongo-uri mongodb://localhost:27017]
+import argparse
+import random
+import time
+from sqlalchemy import create_engine, text
+
+SCHEMA = [
+    "CREATE TABLE users (user_id INTEGER PRIMARY KEY, university_id TEXT, email TEXT, first_name TEXT, last_name TEXT, role TEXT)",
+    "CREATE TABLE students (student_id INTEGER PRIMARY KEY, major TEXT, enrollment_year INT, current_standing TEXT)",
+    "CREATE TABLE instructors (instructor_id INTEGER PRIMARY KEY, department_code TEXT, title TEXT, office_location TEXT, office_hours TEXT)",
+]
+
+JOINED = """
+    SELECT u.user_id, u.university_id, u.first_name, u.last_name, u.email, u.role,
+           s.student_id, s.major, s.enrollment_year, s.current_standing,
+           i.instructor_id, i.department_code, i.title, i.office_location, i.office_hours
+    FROM users u
+    LEFT JOIN students s ON s.student_id = u.user_id
+    LEFT JOIN instructors i ON i.instructor_id = u.user_id
+    ORDER BY u.user_id
+"""
+
+def seed(engine, n):
+    rng = random.Random(0)
+    users, students, instructors = [], [], []
+    for user_id in range(1, n + 1):
+        role = "instructor" if user_id % 20 == 0 else "student"
+        users.append({"id": user_id, "uni": f"U{user_id:07d}", "email": f"user{user_id}@example.edu",
+                      "first": f"First{user_id}", "last": f"Last{rng.randrange(5000)}", "role": role})
+        if role == "student":
+            students.append({"id": user_id, "major": rng.choice(["Software Engineering", "Computer Science", "Information Security"]),
+                             "year": rng.randrange(2019, 2026), "standing": "Good"})
+        else:
+            instructors.append({"id": user_id, "dept": rng.choice(["INF", "CSC", "ICT"]), "title": "Dr",
+                                "office": f"E{rng.randrange(100)}", "hours": "Mon 2-4pm"})
+    with engine.begin() as conn:
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO users VALUES (:id, :uni, :email, :first, :last, :role)"), users)
+        conn.execute(text("INSERT INTO students VALUES (:id, :major, :year, :standing)"), students)
+        conn.execute(text("INSERT INTO instructors VALUES (:id, :dept, :title, :office, :hours)"), instructors)
+
+def build_doc(row):
+    details = ""
+    if row["role"] == "student" and row["student_id"] is not None:
+        details = f"Major: {row['major']}. Year: {row['enrollment_year']}. Standing: {row['current_standing']}."
+    elif row["role"] == "instructor" and row["instructor_id"] is not None:
+        details = f"Title: {row['title']}. Department: {row['department_code']}."
+    return {"user_id": row["user_id"], "first_name": row["first_name"], "last_name": row["last_name"],
+            "role": row["role"], "info": details, "type": "user"}
+
+def read_per_user(engine):
+    docs = []
+    with engine.connect() as conn:
+        for user in conn.execute(text("SELECT user_id, first_name, last_name, role FROM users")).mappings().all():
+            row = dict(user, student_id=None, instructor_id=None)
+            if user["role"] == "student":
+                child = conn.execute(text("SELECT * FROM students WHERE student_id = :id"), {"id": user["user_id"]}).mappings().first()
+            else:
+                child = conn.execute(text("SELECT * FROM instructors WHERE instructor_id = :id"), {"id": user["user_id"]}).mappings().first()
+            row.update(child or {})
+            docs.append(build_doc(row))
+    return docs
+
+def read_joined(engine, read_batch_size):
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=read_batch_size).execute(text(JOINED)).mappings()
+        return [build_doc(row) for row in result]
+
+def timed(label, n, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<36} {elapsed:>8.2f}s {n / elapsed:>12,.0f} rows/s")
+    return result, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="generate_vectors.py user phase: per-row vs set-based")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--read-batch-size", type=int, default=1000)
+    parser.add_argument("--write-batch-size", type=int, default=1000)
+    parser.add_argument("--mongo-uri", help="also time the Mongo writes against this server (uses a scratch database)")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    seed(engine, args.users)
+    print(f"{args.users:,} synthetic users\n")
+
+    docs, per_user = timed("read: per-user lookups", args.users, lambda: read_per_user(engine))
+    _, joined = timed(f"read: joined, yield_per={args.read_batch_size}", args.users,
+                      lambda: read_joined(engine, args.read_batch_size))
+    print(f"{'':<36} {per_user / joined:>8.1f}x faster")
+
+    if args.mongo_uri:
+        from pymongo import MongoClient, InsertOne
+        client = MongoClient(args.mongo_uri)
+        collection = client["etl_benchmark"]["users"]
+        collection.drop()
+        _, one_by_one = timed("write: insert_one per user", len(docs),
+                              lambda: [collection.insert_one(dict(d)) for d in docs])
+        collection.drop()
+
+        def batched():
+            ops = [InsertOne(dict(d)) for d in docs]
+            for start in range(0, len(ops), args.write_batch_size):
+                collection.bulk_write(ops[start:start + args.write_batch_size], ordered=True)
+        _, bulk = timed(f"write: bulk_write batches of {args.write_batch_size}", len(docs), batched)
+        print(f"{'':<36} {one_by_one / bulk:>8.1f}x faster")
+        client.drop_database("etl_benchmark")
+
+if __name__ == '__main__':
+    main()
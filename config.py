@@ -6,6 +6,76 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'a-very-hard-to-guess-secret-key'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # --- SEARCH ---
+    # 'atlas' uses the $vectorSearch stage, 'local' scores module embeddings in-process
+    # (works against any MongoDB, including a local instance without Atlas Search),
+    # 'ivf' searches an in-process IVF-flat ANN index (also used by the SQL provider)
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND') or 'atlas'
+
+    # IVF-flat: cells probed per query, filtered searches below this many candidates stay exact,
+    # directory for the persisted index ('' keeps it in memory)
+    ANN_NPROBE = int(os.environ.get('ANN_NPROBE', 16))
+    ANN_EXACT_BELOW = int(os.environ.get('ANN_EXACT_BELOW', 20000))
+    ANN_INDEX_DIR = os.environ.get('ANN_INDEX_DIR', '')
+
+    # Neighbours kept per module in the precomputed similar-modules graph (/api/modules/<id>/similar)
+    SIMILAR_MODULES_K = int(os.environ.get('SIMILAR_MODULES_K', 10))
+
+    # Keyword search engine for the SQL provider: 'auto' (MySQL FULLTEXT / SQLite FTS5), or 'python' (in-memory BM25)
+    FULLTEXT_BACKEND = os.environ.get('FULLTEXT_BACKEND') or 'auto'
+
+    # Hybrid search (/api/search?mode=hybrid): candidates per retriever, RRF constant, vector share for fusion=weighted
+    HYBRID_CANDIDATES = int(os.environ.get('HYBRID_CANDIDATES', 50))
+    HYBRID_RRF_K = int(os.environ.get('HYBRID_RRF_K', 60))
+    HYBRID_VECTOR_WEIGHT = float(os.environ.get('HYBRID_VECTOR_WEIGHT', 0.5))
+
+    # Typo-tolerant matching (trigram candidates, edit-distance verified): minimum similarity for a
+    # module name/code to short-circuit semantic search, and for an instructor name match
+    FUZZY_MODULE_SIMILARITY = float(os.environ.get('FUZZY_MODULE_SIMILARITY', 0.85))
+    FUZZY_NAME_SIMILARITY = float(os.environ.get('FUZZY_NAME_SIMILARITY', 0.75))
+
+    # LRU cache of query embeddings (entries, seconds; TTL of None keeps entries until evicted)
+    EMBEDDING_CACHE_SIZE = int(os.environ.get('EMBEDDING_CACHE_SIZE', 1024))
+    EMBEDDING_CACHE_TTL = float(os.environ.get('EMBEDDING_CACHE_TTL', 3600))
+
+    # On-disk embedding store (memory-mapped, shared by the ETL and all web workers; '' disables it).
+    # The web app only reads it unless EMBEDDING_STORE_APPEND_QUERIES=1, which also stores new query embeddings.
+    EMBEDDING_STORE_DIR = os.environ.get('EMBEDDING_STORE_DIR', '')
+    EMBEDDING_STORE_APPEND_QUERIES = os.environ.get('EMBEDDING_STORE_APPEND_QUERIES', '0') == '1'
+
+    # Re-embed queue for module create/update: background worker on/off (opt-in, so scripts that call
+    # create_app such as generate_vectors.py never start one), jobs per encode batch,
+    # poll interval for jobs queued by other processes, wait after a write so bursts batch together,
+    # retries per job and the lease after which a crashed worker's claim expires
+    EMBEDDING_JOBS_WORKER = os.environ.get('EMBEDDING_JOBS_WORKER', '0') == '1'
+    EMBEDDING_JOBS_BATCH_SIZE = int(os.environ.get('EMBEDDING_JOBS_BATCH_SIZE', 64))
+    EMBEDDING_JOBS_POLL_SECONDS = float(os.environ.get('EMBEDDING_JOBS_POLL_SECONDS', 5))
+    EMBEDDING_JOBS_BATCH_WINDOW_MS = float(os.environ.get('EMBEDDING_JOBS_BATCH_WINDOW_MS', 500))
+    EMBEDDING_JOBS_MAX_ATTEMPTS = int(os.environ.get('EMBEDDING_JOBS_MAX_ATTEMPTS', 5))
+    EMBEDDING_JOBS_LEASE_SECONDS = float(os.environ.get('EMBEDDING_JOBS_LEASE_SECONDS', 300))
+
+    # LRU cache of /api/search results, invalidated by module and enrollment writes (TTL bounds staleness across workers)
+    SEARCH_CACHE_SIZE = int(os.environ.get('SEARCH_CACHE_SIZE', 2048))
+    SEARCH_CACHE_TTL = float(os.environ.get('SEARCH_CACHE_TTL', 300))
+
+    # /api/search sizing: largest `limit` and `page_size` accepted; ranked lists behind cursors (entries, seconds)
+    SEARCH_MAX_LIMIT = int(os.environ.get('SEARCH_MAX_LIMIT', 500))
+    SEARCH_MAX_PAGE_SIZE = int(os.environ.get('SEARCH_MAX_PAGE_SIZE', 50))
+    SEARCH_CURSOR_CACHE_SIZE = int(os.environ.get('SEARCH_CURSOR_CACHE_SIZE', 1024))
+    SEARCH_CURSOR_TTL = float(os.environ.get('SEARCH_CURSOR_TTL', 600))
+
+    # Micro-batch concurrent query encodes: flush after ENCODER_BATCH_WINDOW_MS or ENCODER_MAX_BATCH queries
+    ENCODER_BATCHING = os.environ.get('ENCODER_BATCHING', '0') == '1'
+    ENCODER_BATCH_WINDOW_MS = float(os.environ.get('ENCODER_BATCH_WINDOW_MS', 3))
+    ENCODER_MAX_BATCH = int(os.environ.get('ENCODER_MAX_BATCH', 32))
+
+    # Load the sentence-transformers model in a background thread at startup
+    PRELOAD_MODEL = os.environ.get('PRELOAD_MODEL', '0') == '1'
+
+    # Readiness probe: time limit for the Mongo ping, and how long its DB results are reused
+    READINESS_TIMEOUT_MS = float(os.environ.get('READINESS_TIMEOUT_MS', 1500))
+    READINESS_CACHE_SECONDS = float(os.environ.get('READINESS_CACHE_SECONDS', 5))
+
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
@@ -2,208 +2,663 @@
 # THIS FILE IS NOT MEANT TO BE RAN EVERYTIME
 # AND ALSO GENERATES EMBEDDINGS FOR MODULES AND USERS
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from website import create_app
 from website.models import Module, User, Instructor, Student
 from website import db as sql_db
 from website import mongo
+from website.services.embedding_codec import (
+    EMBEDDING_FORMATS, pack_embedding, unpack_embedding, recall_at_k
+)
+from website.services.embeddings import MODEL_NAME, module_embedding_text, embedding_hash
+from website.services.recommendations import compute_recommendations
+from website.services.etl_pipeline import run_pipeline
+from website.services.embedding_store import open_embedding_store
 from sqlalchemy.orm import aliased
+from sqlalchemy import text, bindparam
+from pymongo import UpdateOne, ReplaceOne, ASCENDING
+from pymongo.errors import OperationFailure
+from datetime import datetime
+from bson import BSON
+import argparse
+import time
 import re
 
-def generate_and_store_embeddings():
+def report_rate(phase, rows, seconds):
+    rate = rows / seconds if seconds > 0 else 0.0
+    print(f"    {phase}: {rows} rows in {seconds:.2f}s ({rate:,.0f} rows/s)")
+
+def bulk_write_batches(collection, ops, batch_size=1000, ordered=True):
+    """Sends `ops` as bulk_write calls of at most `batch_size` operations."""
+    for start in range(0, len(ops), batch_size):
+        collection.bulk_write(ops[start:start + batch_size], ordered=ordered)
+
+# ==========================================
+# PART A: MODULES
+# ==========================================
+def _read_modules(after, limit):
+    InstructorUser = aliased(User)
+    
+    # UPDATED QUERY: We use .label() to avoid ambiguity and ensure we get the right columns
+    query = sql_db.session.query(
+        Module.module_id,
+        Module.module_name,
+        Module.description,
+        Module.credits,
+        Module.academic_term,
+        Module.max_capacity,
+        Module.current_enrollment,
+        Module.target_majors,
+        InstructorUser.first_name.label('instr_first'), 
+        InstructorUser.last_name.label('instr_last')    
+    ).outerjoin(Module.instructor)\
+     .outerjoin(Instructor.user.of_type(InstructorUser))
+    if after is not None:
+        query = query.filter(Module.module_id > after)
+    return query.order_by(Module.module_id).limit(limit).all()
+
+def _module_doc(module):
+    """(mongo doc, text to embed, None) for one module row; None for modules without a description."""
+    if not module.description:
+        return None
+
+    # --- LOGIC FIX ---
+    # We check truthiness (if module.instr_first) which catches both None and Empty Strings
+    if module.instr_first and module.instr_last:
+        instructor_name = f"{module.instr_first} {module.instr_last}"
+    else:
+        instructor_name = "TBA"
+    
+    # UPDATED EMBEDDING TEXT (shared with the re-embed job queue)
+    text_to_embed = module_embedding_text(module.module_id, module.module_name, module.description,
+                                          instructor_name, module.credits, module.academic_term)
+
+    # Logic for level extraction
+    module_level = 1000
+    match = re.search(r'\d', module.module_id)
+    if match:
+        module_level = int(match.group()) * 1000
+
+    # Logic for slots
+    cap = module.max_capacity if module.max_capacity is not None else 0
+    curr = module.current_enrollment if module.current_enrollment is not None else 0
+    slots_left = cap - curr
+
+    # Clean up target majors
+    majors_list = [m.strip() for m in module.target_majors.split(',')] if module.target_majors else ["All"]
+
+    return {
+        "module_id": module.module_id,
+        "module_name": module.module_name,
+        "description": module.description,
+        "credits": module.credits,
+        "max_capacity": module.max_capacity,
+        "current_enrollment": module.current_enrollment,
+        "slots_left": slots_left,
+        "academic_term": module.academic_term,
+        "module_level": module_level,
+        "instructor_name": instructor_name,
+        "target_majors": majors_list,
+        "type": "module" 
+    }, text_to_embed, None
+
+def _sql_vector_ids(module_ids):
+    """The module ids among `module_ids` that already have a module_embeddings row for MODEL_NAME."""
+    rows = sql_db.session.execute(
+        text("SELECT module_id FROM module_embeddings WHERE model_version = :model AND module_id IN :ids")
+        .bindparams(bindparam("ids", expanding=True)),
+        {"model": MODEL_NAME, "ids": list(module_ids)}
+    )
+    return {r.module_id for r in rows}
+
+def _current_module_ids():
+    rows = sql_db.session.query(Module.module_id).filter(Module.description.isnot(None), Module.description != '')
+    return {r.module_id for r in rows}
+
+# ==========================================
+# PART B: USERS
+# ==========================================
+def _read_users(after, limit):
+    # One outer-joined query (users + students + instructors) per chunk,
+    # instead of a Student/Instructor lookup per user
+    query = sql_db.session.query(
+        User.user_id,
+        User.university_id,
+        User.first_name,
+        User.last_name,
+        User.email,
+        User.role,
+        Student.student_id,
+        Student.major,
+        Student.enrollment_year,
+        Student.current_standing,
+        Instructor.instructor_id,
+        Instructor.department_code,
+        Instructor.title,
+        Instructor.office_location,
+        Instructor.office_hours
+    ).outerjoin(Student, Student.student_id == User.user_id)\
+     .outerjoin(Instructor, Instructor.instructor_id == User.user_id)
+    if after is not None:
+        query = query.filter(User.user_id > after)
+    return query.order_by(User.user_id).limit(limit).all()
+
+def _user_doc(user):
+    """(mongo doc, text to embed, instructors doc or None) for one joined user row."""
+    # 1. Base Variables
+    role_descriptor = user.role.capitalize()
+    details = ""
+    major_or_dept = ""
+    instructor_doc = None
+
+    # 2. Enrich based on Role (columns of the joined child tables)
+    if user.role == 'student' and user.student_id is not None:
+        major_or_dept = user.major
+        details = f"Major: {user.major}. Year: {user.enrollment_year}. Standing: {user.current_standing}."
+        role_descriptor = "Student"
+    
+    elif user.role == 'instructor' and user.instructor_id is not None:
+        major_or_dept = user.department_code
+
+        details = (
+            f"Title: {user.title}. "
+            f"Department: {user.department_code}. "
+            f"Office: {user.office_location}. "
+            f"Hours: {user.office_hours}."
+        )
+        role_descriptor = user.title 
+
+        instructor_doc = {
+            "instructor_id": user.user_id,
+            "department_code": user.department_code,
+            "title": user.title,
+            "office_location": user.office_location,
+            "office_hours": user.office_hours
+        }
+
+    # 3. Construct Text to Embed
+    # We use the schema data to create a "Bio-like" string for the AI
+    text_to_embed = f"{role_descriptor} {user.first_name} {user.last_name}. {details}"
+
+    # 4. Create Mongo Document (embedding added after encoding)
+    return {
+        "user_id": user.user_id, 
+        "university_id": user.university_id,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "email": user.email,
+        "role": user.role,
+        "info": details, 
+        "context_key": major_or_dept, 
+        "type": "user"
+    }, text_to_embed, instructor_doc
+
+def _current_user_ids():
+    return {r.user_id for r in sql_db.session.query(User.user_id)}
+
+def _current_instructor_ids():
+    rows = sql_db.session.query(Instructor.instructor_id)\
+        .join(User, User.user_id == Instructor.instructor_id)\
+        .filter(User.role == 'instructor')
+    return {r.instructor_id for r in rows}
+
+ENTITIES = {
+    "modules": {"label": "MODULES", "key": "module_id", "read": _read_modules, "to_doc": _module_doc,
+                "current_ids": _current_module_ids},
+    "users": {"label": "USERS", "key": "user_id", "read": _read_users, "to_doc": _user_doc,
+              "current_ids": _current_user_ids},
+}
+
+# ==========================================
+# CHECKPOINTS (Mongo 'etl_checkpoints', one doc per entity)
+# ==========================================
+def _start_checkpoint(entity, embedding_format, incremental, restart, target):
+    """Returns the key to resume after (None for a fresh run) and records the run."""
+    checkpoints = mongo.db.etl_checkpoints
+    previous = checkpoints.find_one({"_id": entity})
+    if (previous and not restart and previous.get("finished_at") is None
+            and previous.get("model") == MODEL_NAME and previous.get("embedding_format") == embedding_format
+            and previous.get("target", entity) == target):
+        print(f"Resuming {entity} after key {previous['last_key']!r} ({previous.get('rows', 0)} rows already done).")
+        return previous["last_key"]
+    now = datetime.now().isoformat()
+    checkpoints.replace_one({"_id": entity}, {
+        "_id": entity, "last_key": None, "rows": 0, "model": MODEL_NAME, "embedding_format": embedding_format,
+        "incremental": incremental, "target": target, "started_at": now, "updated_at": now, "finished_at": None
+    }, upsert=True)
+    return None
+
+def _save_checkpoint(entity, last_key, rows):
+    mongo.db.etl_checkpoints.update_one(
+        {"_id": entity},
+        {"$set": {"last_key": last_key, "updated_at": datetime.now().isoformat()}, "$inc": {"rows": rows}}
+    )
+
+def _finish_checkpoint(entity):
+    mongo.db.etl_checkpoints.update_one({"_id": entity}, {"$set": {"finished_at": datetime.now().isoformat()}})
+
+def _delete_orphans(collection, key, current_ids, batch_size):
+    """Deletes documents whose `key` is not in current_ids (rows deleted from SQL since the last run)."""
+    stale = [d[key] for d in collection.find({}, {"_id": 0, key: 1}) if d.get(key) not in current_ids]
+    for start in range(0, len(stale), batch_size):
+        collection.delete_many({key: {"$in": stale[start:start + batch_size]}})
+    return len(stale)
+
+# ==========================================
+# BLUE/GREEN SWAP (build '<name>_build', validate, rename over the live collection)
+# ==========================================
+# seconds to wait for Atlas to build the search indexes on a build collection
+SEARCH_INDEX_TIMEOUT = 1800
+
+def _copy_indexes(source, target):
+    """Creates the secondary indexes of `source` on `target` (skipping keys `target` already has)."""
+    existing = {tuple(info["key"]) for info in target.index_information().values()}
+    for name, info in source.index_information().items():
+        if name == "_id_" or tuple(info["key"]) in existing:
+            continue
+        options = {k: v for k, v in info.items() if k not in ("key", "v", "ns")}
+        target.create_index(info["key"], name=name, **options)
+
+def _search_indexes(collection):
+    """Atlas Search / Vector Search index definitions by name; {} where the server has none (not Atlas)."""
+    try:
+        return {info["name"]: info for info in collection.list_search_indexes()}
+    except OperationFailure:
+        return {}
+
+def _copy_search_indexes(source, target):
+    """Creates (or updates) the Atlas search indexes of `source` on `target`; returns their names."""
+    existing = _search_indexes(target)
+    for name, info in _search_indexes(source).items():
+        definition = info.get("latestDefinition") or info.get("definition")
+        if name not in existing:
+            target.create_search_index({"name": name, "type": info.get("type", "search"), "definition": definition})
+        elif (existing[name].get("latestDefinition") or existing[name].get("definition")) != definition:
+            target.update_search_index(name, definition)
+    return [name for name in _search_indexes(source)]
+
+def _wait_until_queryable(collection, names, timeout=SEARCH_INDEX_TIMEOUT):
+    """Blocks until every search index in `names` reports queryable (Atlas builds them asynchronously)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        indexes = _search_indexes(collection)
+        pending = [name for name in names if not indexes.get(name, {}).get("queryable")]
+        if not pending:
+            return
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"search index(es) {pending} on {collection.name} not queryable after {timeout}s; not swapping.")
+        print(f"Waiting for search index(es) {pending} on {collection.name}...")
+        time.sleep(5)
+
+def _validate_build(build, expected_count, require_embedding=True):
+    """Raises if `build` does not hold exactly the expected documents, all embedded."""
+    count = build.count_documents({})
+    if count != expected_count:
+        raise RuntimeError(f"{build.name} holds {count} documents, SQL has {expected_count}; not swapping.")
+    if require_embedding:
+        missing = build.count_documents({"embedding": {"$exists": False}})
+        if missing:
+            raise RuntimeError(f"{build.name} has {missing} documents without an embedding; not swapping.")
+
+def _swap_in(pairs):
+    """
+    Renames each (build, live name) over the live collection; each rename is atomic for readers.
+    The live collection's indexes, including Atlas search indexes such as 'vector_index_search'
+    (which rename(dropTarget) would otherwise drop with it), are recreated on the build first.
+    """
+    for build, live_name in pairs:
+        _copy_indexes(mongo.db[live_name], build)
+        _wait_until_queryable(build, _copy_search_indexes(mongo.db[live_name], build))
+    for build, live_name in pairs:
+        build.rename(live_name, dropTarget=True)
+        print(f"Swapped {build.name} -> {live_name}.")
+
+def _process_entity(app, entity, embedding_format, sql_embeddings, incremental, chunk_size,
+                    workers, batch_size, normalize, write_batch_size, restart, store, swap=False):
+    spec = ENTITIES[entity]
+    key = spec["key"]
+    target = f"{entity}_build" if swap else entity
+    collection = mongo.db[target]
+    instructors = mongo.db["instructors_build" if swap else "instructors"]
+    print(f"\n--- [{spec['label']}] Processing {spec['label']}{f' into {target}' if swap else ''} ---")
+
+    after = _start_checkpoint(entity, embedding_format, incremental, restart, target)
+    resumed = after is not None
+    if swap and not resumed:
+        # leftovers of an abandoned build; emptied rather than dropped so its indexes
+        # (including Atlas search indexes) survive
+        collection.delete_many({})
+        if entity == "users":
+            instructors.delete_many({})
+    collection.create_index([(key, ASCENDING)])
+    if entity == "users":
+        instructors.create_index([("instructor_id", ASCENDING)])
+    totals = {"encoded": 0, "fields": 0, "unchanged": 0}
+
+    # 1. Chunked SQL reader (keyset pagination, so a chunk is one indexed range scan and resumable)
+    def read_chunks():
+        last_key = after
+        while True:
+            rows = spec["read"](last_key, chunk_size)
+            if not rows:
+                return
+            last_key = getattr(rows[-1], key)
+            yield len(rows), (last_key, rows)
+            if len(rows) < chunk_size:
+                return
+
+    # 2. Text builder (incremental mode drops rows whose embedded text is unchanged, unless
+    #    --sql-embeddings is missing their vector, so a partial module_embeddings table is backfilled)
+    def build(chunk):
+        last_key, rows = chunk
+        docs, texts, instructor_docs = [], [], []
+        for row in rows:
+            built = spec["to_doc"](row)
+            if built is None:
+                continue
+            doc, text_to_embed, instructor_doc = built
+            doc["embedding_hash"] = embedding_hash(text_to_embed)
+            docs.append(doc)
+            texts.append(text_to_embed)
+            if instructor_doc:
+                instructor_docs.append(instructor_doc)
+
+        field_ops, unchanged = [], 0
+        if incremental and docs:
+            existing = {d[key]: d for d in collection.find(
+                {key: {"$in": [doc[key] for doc in docs]}},
+                {"_id": 0, "embedding": 0, "embedding_format": 0, "embedding_scale": 0}
+            )}
+            in_sql = None
+            if sql_embeddings and entity == "modules":
+                in_sql = _sql_vector_ids([doc[key] for doc in docs])
+            changed = []
+            for doc, text_to_embed in zip(docs, texts):
+                old = existing.get(doc[key])
+                if (old is None or old.get("embedding_hash") != doc["embedding_hash"]
+                        or (in_sql is not None and doc[key] not in in_sql)):
+                    changed.append((doc, text_to_embed))
+                elif any(old.get(field) != value for field, value in doc.items()):
+                    field_ops.append(UpdateOne({key: doc[key]}, {"$set": doc}))
+                else:
+                    unchanged += 1
+            docs, texts = [d for d, _ in changed], [t for _, t in changed]
+        return texts, (last_key, len(rows), docs, field_ops, unchanged, instructor_docs)
+
+    # 4. Mongo bulk writer (3. is the encoder pool in run_pipeline); checkpoints after every chunk
+    def write(payload, vectors):
+        last_key, row_count, docs, field_ops, unchanged, instructor_docs = payload
+        ops = field_ops + [
+            ReplaceOne({key: doc[key]}, {**doc, **pack_embedding(vector, embedding_format)}, upsert=True)
+            for doc, vector in zip(docs, vectors)
+        ]
+        bulk_write_batches(collection, ops, write_batch_size)
+        bulk_write_batches(instructors, [
+            ReplaceOne({"instructor_id": d["instructor_id"]}, d, upsert=True) for d in instructor_docs
+        ], write_batch_size)
+
+        if sql_embeddings and entity == "modules" and docs:
+            sql_db.session.execute(
+                text("DELETE FROM module_embeddings WHERE model_version = :model AND module_id IN :ids")
+                .bindparams(bindparam("ids", expanding=True)),
+                {"model": MODEL_NAME, "ids": [doc["module_id"] for doc in docs]}
+            )
+            sql_db.session.execute(
+                text("INSERT INTO module_embeddings (module_id, model_version, vector) VALUES (:id, :model, :vec)"),
+                [{"id": doc["module_id"], "model": MODEL_NAME, "vec": np.asarray(vector, dtype='<f4').tobytes()}
+                 for doc, vector in zip(docs, vectors)]
+            )
+            sql_db.session.commit()
+
+        _save_checkpoint(entity, last_key, row_count)
+        totals["encoded"] += len(docs)
+        totals["fields"] += len(field_ops)
+        totals["unchanged"] += unchanged
+
+    stats = run_pipeline(read_chunks, build, write, MODEL_NAME, workers=workers, batch_size=batch_size,
+                         normalize=normalize, context=app.app_context, store=store)
+    for phase, (rows, seconds) in stats.items():
+        if phase != "store hits" or store is not None:
+            report_rate(phase, rows, seconds)
+
+    if stats["read"][0] == 0 and not resumed:
+        print(f"No {entity} found in SQL.")
+        return
+
+    # 5. Orphans: documents (and SQL vectors) whose SQL row no longer exists
+    current_ids = spec["current_ids"]()
+    removed = _delete_orphans(collection, key, current_ids, write_batch_size)
+    if entity == "users":
+        current_instructors = _current_instructor_ids()
+        _delete_orphans(instructors, "instructor_id", current_instructors, write_batch_size)
+    if sql_embeddings and entity == "modules":
+        sql_db.session.execute(text(
+            "DELETE FROM module_embeddings WHERE model_version = :model AND module_id NOT IN "
+            "(SELECT module_id FROM modules WHERE description IS NOT NULL AND description <> '')"
+        ), {"model": MODEL_NAME})
+        sql_db.session.commit()
+
+    # 6. Swap: the live collections are only replaced once the build is complete
+    if swap:
+        _validate_build(collection, len(current_ids))
+        pairs = [(collection, entity)]
+        if entity == "users":
+            _validate_build(instructors, len(current_instructors), require_embedding=False)
+            pairs.append((instructors, "instructors"))
+        _swap_in(pairs)
+    _finish_checkpoint(entity)
+    print(f"Stored {entity} in MongoDB: {totals['encoded']} encoded, {totals['fields']} with field changes only, "
+          f"{totals['unchanged']} unchanged, {removed} removed.")
+
+def generate_and_store_embeddings(embedding_format='float32', sql_embeddings=False,
+                                  batch_size=64, normalize=True, workers=0, incremental=False,
+                                  chunk_size=1000, write_batch_size=1000, entity='all', restart=False,
+                                  embedding_store_dir=None, swap=False):
     """
     1. Fetches MODULES, embeds descriptions, stores in Mongo 'modules'.
     2. Fetches USERS (linked with Student/Instructor details), embeds info, stores in Mongo 'users'.
+    embedding_format: 'float32' (BSON array, needed by Atlas $vectorSearch), 'float16' or 'int8' (packed Binary).
+    sql_embeddings: also write module vectors to the SQL 'module_embeddings' table (semantic search in SQL mode).
+    Rows stream through a chunked SQL reader (`chunk_size` rows), a text builder, `workers` encoder processes
+    (batches of `batch_size`, unit-length when `normalize`) and a Mongo bulk writer (`write_batch_size`),
+    with bounded queues in between, so memory does not grow with the tables. Each written chunk is
+    checkpointed in 'etl_checkpoints'; an interrupted run resumes after the last written key unless `restart`.
+    incremental: only re-encode rows whose text (or the model) changed, compared via 'embedding_hash'.
+    entity: 'modules', 'users' or 'all'.
+    embedding_store_dir: on-disk embedding store consulted before encoding and extended with new
+    embeddings (default: the app's EMBEDDING_STORE_DIR; '' disables it).
+    swap: build into 'modules_build'/'users_build'/'instructors_build', check the counts against SQL and
+    rename them over the live collections (dropTarget), so readers never see a partial rebuild.
     """
+    if swap and incremental:
+        raise ValueError("swap rebuilds the collections from scratch and cannot be combined with incremental")
     print("--- STEP 1: Starting Script ---")
-
-    # 1. Load the pre-trained NLP model
-    print("--- STEP 2: Loading NLP Model (This takes time on first run)...")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    print("--- STEP 2: DONE. Model Loaded. ---")
-
-    # 2. Connect to databases
     app = create_app()
     
     # We use the app context to access the database configured in create_app()
     with app.app_context():
-        print("--- STEP 3: Connecting to SQL Database... ---")
-
-        # ==========================================
-        # PART A: PROCESS MODULES
-        # ==========================================
-        print("\n--- [PART A] Processing MODULES ---")
-        
-        InstructorUser = aliased(User)
-        
-        # UPDATED QUERY: We use .label() to avoid ambiguity and ensure we get the right columns
-        sql_modules = sql_db.session.query(
-            Module.module_id,
-            Module.module_name,
-            Module.description,
-            Module.credits,
-            Module.academic_term,
-            Module.max_capacity,
-            Module.current_enrollment,
-            Module.target_majors,
-            InstructorUser.first_name.label('instr_first'), 
-            InstructorUser.last_name.label('instr_last')    
-        ).outerjoin(Module.instructor)\
-         .outerjoin(Instructor.user.of_type(InstructorUser))\
-         .all()
-
-        if sql_modules:
-            print(f"Found {len(sql_modules)} modules in SQL.")
-            
-            modules_collection = mongo.db.modules
-            modules_collection.delete_many({}) 
-
-            module_docs = []
-            for module in sql_modules:
-                if not module.description:
-                    continue
-
-                # --- LOGIC FIX ---
-                # We check truthiness (if module.instr_first) which catches both None and Empty Strings
-                if module.instr_first and module.instr_last:
-                    instructor_name = f"{module.instr_first} {module.instr_last}"
-                else:
-                    instructor_name = "TBA"
-                
-                # UPDATED EMBEDDING TEXT
-                text_to_embed = (
-                    f"{module.module_id} {module.module_name}: {module.description}. "
-                    f"Taught by {instructor_name}. "
-                    f"Credits: {module.credits}. "
-                    f"Term: {module.academic_term}."
-                )
-                
-                embedding = model.encode(text_to_embed).tolist()
-
-                
-                # Logic for level extraction
-                module_level = 1000
-                match = re.search(r'\d', module.module_id)
-                if match:
-                    module_level = int(match.group()) * 1000
-
-                # Logic for slots
-                cap = module.max_capacity if module.max_capacity is not None else 0
-                curr = module.current_enrollment if module.current_enrollment is not None else 0
-                slots_left = cap - curr
-
-                # Clean up target majors
-                majors_list = [m.strip() for m in module.target_majors.split(',')] if module.target_majors else ["All"]
-
-                mongo_doc = {
-                    "module_id": module.module_id,
-                    "module_name": module.module_name,
-                    "description": module.description,
-                    "embedding": embedding,
-                    "credits": module.credits,
-                    "max_capacity": module.max_capacity,
-                    "current_enrollment": module.current_enrollment,
-                    "slots_left": slots_left,
-                    "academic_term": module.academic_term,
-                    "module_level": module_level,
-                    "instructor_name": instructor_name,
-                    "target_majors": majors_list,
-                    "type": "module" 
-                }
-                module_docs.append(mongo_doc)
-
-            if module_docs:
-                modules_collection.insert_many(module_docs)
-                print(f"Inserted {len(module_docs)} modules into MongoDB.")
-        else:
-            print("No modules found in SQL.")
-
-        # ==========================================
-        # PART B: PROCESS USERS
-        # ==========================================
-        print("\n--- [PART B] Processing USERS ---")
-
-        # Fetch all users using the session directly to avoid context errors
-        sql_users = sql_db.session.query(User).all()
-        
-        if sql_users:
-            print(f"Found {len(sql_users)} users in SQL.")
-
-            # Connect to Mongo Users Collection
-            users_collection = mongo.db.users
-            users_collection.delete_many({}) 
-            mongo.db.instructors.delete_many({}) 
-
-            user_docs = []
-            for user in sql_users:
-                # 1. Base Variables
-                role_descriptor = user.role.capitalize()
-                details = ""
-                major_or_dept = ""
-
-                # 2. Enrich based on Role (Querying Child Tables)
-                if user.role == 'student':
-                    # Use session.query instead of Model.query
-                    student_info = sql_db.session.query(Student).get(user.user_id)
-                    if student_info:
-                        major_or_dept = student_info.major
-                        details = f"Major: {student_info.major}. Year: {student_info.enrollment_year}. Standing: {student_info.current_standing}."
-                        role_descriptor = "Student"
-                
-                elif user.role == 'instructor':
-                    instructor_info = sql_db.session.query(Instructor).get(user.user_id)
-                    if instructor_info:
-                        major_or_dept = instructor_info.department_code
-
-                        details = (
-                            f"Title: {instructor_info.title}. "
-                            f"Department: {instructor_info.department_code}. "
-                            f"Office: {instructor_info.office_location}. "
-                            f"Hours: {instructor_info.office_hours}."
-                        )
-                        role_descriptor = instructor_info.title 
-
-              
-                        mongo.db.instructors.insert_one({
-                            "instructor_id": user.user_id,
-                            "department_code": instructor_info.department_code,
-                            "title": instructor_info.title,
-                            "office_location": instructor_info.office_location,
-                            "office_hours": instructor_info.office_hours
-                        })
-
-                # 3. Construct Text to Embed
-                # We use the schema data to create a "Bio-like" string for the AI
-                text_to_embed = f"{role_descriptor} {user.first_name} {user.last_name}. {details}"
-                
-                # 4. Generate Vector
-                embedding = model.encode(text_to_embed).tolist()
-
-                # 5. Create Mongo Document
-                user_doc = {
-                    "user_id": user.user_id, 
-                    "university_id": user.university_id,
-                    "first_name": user.first_name,
-                    "last_name": user.last_name,
-                    "email": user.email,
-                    "role": user.role,
-                    "info": details, 
-                    "context_key": major_or_dept, 
-                    "embedding": embedding,
-                    "type": "user"
-                }
-                user_docs.append(user_doc)
-
-            # 6. Insert into Mongo
-            if user_docs:
-                users_collection.insert_many(user_docs)
-                print(f"Inserted {len(user_docs)} users into MongoDB.")
-            else:
-                print("No eligible users to insert.")
-        else:
-            print("No users found in SQL.")
+        print("--- STEP 2: Connecting to SQL Database... ---")
+        print(f"--- STEP 3: Encoding with {max(workers, 1)} worker process(es), chunks of {chunk_size} rows ---")
+        if embedding_store_dir is None:
+            embedding_store_dir = app.config.get('EMBEDDING_STORE_DIR', '')
+        store = open_embedding_store(embedding_store_dir, MODEL_NAME)
+        if store is not None:
+            print(f"Embedding store {store.path}: {len(store)} stored embeddings.")
+        for name in (ENTITIES if entity == 'all' else [entity]):
+            _process_entity(app, name, embedding_format, sql_embeddings, incremental, chunk_size,
+                            workers, batch_size, normalize, write_batch_size, restart, store, swap)
 
     print("\n--- Success! Database Population Complete. ---")
 
+def migrate_embedding_format(target_format, batch_size=500, dry_run=False):
+    """
+    Re-encodes the stored embeddings of 'modules' and 'users' into `target_format` in place
+    (no model needed), after printing the size saving and recall@10 against float32.
+    """
+    app = create_app()
+    with app.app_context():
+        for name in ("modules", "users"):
+            collection = mongo.db[name]
+            docs = list(collection.find(
+                {"embedding": {"$exists": True}},
+                {"_id": 1, "embedding": 1, "embedding_format": 1, "embedding_scale": 1}
+            ))
+            if not docs:
+                print(f"[{name}] no embeddings to migrate.")
+                continue
+
+            reference = np.vstack([unpack_embedding(d) for d in docs])
+            packed = [pack_embedding(v, target_format) for v in reference]
+            roundtrip = np.vstack([unpack_embedding(p) for p in packed])
+
+            old_bytes = sum(len(BSON.encode({"embedding": d["embedding"]})) for d in docs)
+            new_bytes = sum(len(BSON.encode({"embedding": p["embedding"]})) for p in packed)
+            print(f"[{name}] {len(docs)} embeddings: {old_bytes / len(docs):.0f} B -> {new_bytes / len(docs):.0f} B per doc "
+                  f"({target_format}), recall@10 vs float32 = {recall_at_k(reference, roundtrip, k=10):.4f}")
+
+            if dry_run:
+                continue
+
+            ops = []
+            for doc, fields in zip(docs, packed):
+                update = {"$set": fields}
+                if "embedding_scale" not in fields:
+                    update["$unset"] = {"embedding_scale": ""}
+                ops.append(UpdateOne({"_id": doc["_id"]}, update))
+                if len(ops) >= batch_size:
+                    collection.bulk_write(ops, ordered=False)
+                    ops = []
+            if ops:
+                collection.bulk_write(ops, ordered=False)
+            print(f"[{name}] migrated to {target_format}.")
+
+        if target_format != 'float32':
+            print("Note: packed embeddings are only readable by the local search backend (SEARCH_BACKEND = 'local').")
+
+def build_student_recommendations(top_n=20, major_boost=0.1, batch_size=500):
+    """
+    Scores every student embedding against every module embedding (from 'users' / 'modules'),
+    skips modules the student is enrolled in or has completed, boosts modules targeting the
+    student's major and stores the top `top_n` per student, for /api/students/<id>/recommendations.
+    Writes the Mongo 'recommendations' collection and, if present, the SQL student_recommendations table.
+    """
+    app = create_app()
+    with app.app_context():
+        module_docs = list(mongo.db.modules.find(
+            {"embedding": {"$exists": True}},
+            {"_id": 0, "module_id": 1, "module_name": 1, "target_majors": 1,
+             "embedding": 1, "embedding_format": 1, "embedding_scale": 1}
+        ))
+        student_docs = list(mongo.db.users.find(
+            {"role": "student", "embedding": {"$exists": True}},
+            {"_id": 0, "user_id": 1, "major": 1, "embedding": 1, "embedding_format": 1, "embedding_scale": 1}
+        ))
+        if not module_docs or not student_docs:
+            print("No module or student embeddings found, run generate_vectors.py first.")
+            return
+
+        # majors and enrollments come from SQL when it is reachable (major_id matches target_majors codes)
+        majors, taken = {}, {}
+        try:
+            majors = {r.student_id: r.major_id for r in sql_db.session.execute(text("SELECT student_id, major_id FROM students"))}
+            for r in sql_db.session.execute(text("SELECT student_id, module_id FROM enrollments")):
+                taken.setdefault(r.student_id, set()).add(r.module_id)
+        except Exception as e:
+            sql_db.session.rollback()
+            print(f"SQL unavailable for majors/enrollments ({e}), using Mongo only.")
+        for e in mongo.db.enrollments.find({}, {"_id": 0, "student_id": 1, "module_id": 1}):
+            taken.setdefault(e["student_id"], set()).add(e["module_id"])
+
+        module_ids = [d["module_id"] for d in module_docs]
+        module_names = {d["module_id"]: d.get("module_name") for d in module_docs}
+        student_ids = [d["user_id"] for d in student_docs]
+        results = compute_recommendations(
+            student_ids, np.vstack([unpack_embedding(d) for d in student_docs]),
+            [majors.get(d["user_id"]) or d.get("major") for d in student_docs],
+            module_ids, np.vstack([unpack_embedding(d) for d in module_docs]),
+            [d.get("target_majors") or [] for d in module_docs],
+            taken, top_n=top_n, major_boost=major_boost
+        )
+        for recs in results.values():
+            for rec in recs:
+                rec["module_name"] = module_names.get(rec["module_id"])
+
+        generated_at = datetime.now().isoformat()
+        collection = mongo.db.recommendations
+        collection.create_index([("student_id", ASCENDING)], unique=True)
+        ops = []
+        for student_id, recs in results.items():
+            ops.append(UpdateOne(
+                {"student_id": student_id},
+                {"$set": {"recommendations": recs, "model_version": MODEL_NAME, "generated_at": generated_at}},
+                upsert=True
+            ))
+            if len(ops) >= batch_size:
+                collection.bulk_write(ops, ordered=False)
+                ops = []
+        if ops:
+            collection.bulk_write(ops, ordered=False)
+        print(f"Stored recommendations for {len(results)} students in MongoDB.")
+
+        rows = [
+            {"sid": student_id, "rank": rank, "mid": rec["module_id"], "score": rec["score"]}
+            for student_id, recs in results.items() for rank, rec in enumerate(recs)
+        ]
+        try:
+            sql_db.session.execute(text("DELETE FROM student_recommendations"))
+            if rows:
+                sql_db.session.execute(text(
+                    "INSERT INTO student_recommendations (student_id, `rank`, module_id, score) VALUES (:sid, :rank, :mid, :score)"
+                ), rows)
+            sql_db.session.commit()
+            print(f"Stored {len(rows)} recommendation rows in SQL.")
+        except Exception as e:
+            sql_db.session.rollback()
+            print(f"SQL student_recommendations not written ({e}).")
+
 if __name__ == '__main__':
-    generate_and_store_embeddings()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Populate MongoDB from SQL and generate embeddings.")
+    parser.add_argument("--embedding-format", choices=EMBEDDING_FORMATS, default="float32",
+                        help="storage format for new embeddings (default: float32)")
+    parser.add_argument("--sql-embeddings", action="store_true",
+                        help="also store module embeddings in the SQL module_embeddings table")
+    parser.add_argument("--batch-size", type=int, default=64,
+                        help="texts per model.encode() batch (default: 64)")
+    parser.add_argument("--no-normalize", action="store_true",
+                        help="store raw embeddings instead of unit-length ones")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="encoder worker processes (default: encode in-process)")
+    parser.add_argument("--entity", choices=["all", *ENTITIES], default="all",
+                        help="which collection to (re)build (default: all)")
+    parser.add_argument("--chunk-size", "--read-batch-size", type=int, default=1000,
+                        help="SQL rows read, encoded and written per pipeline chunk (default: 1000)")
+    parser.add_argument("--embedding-store", metavar="DIR",
+                        help="on-disk embedding store to reuse and extend (default: EMBEDDING_STORE_DIR, '' disables)")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore an unfinished checkpoint and start from the first row")
+    parser.add_argument("--write-batch-size", type=int, default=1000,
+                        help="Mongo operations per bulk_write batch (default: 1000)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only re-encode modules/users whose embedded text changed, upsert them and delete orphans")
+    parser.add_argument("--swap", action="store_true",
+                        help="build into *_build collections and swap them in once validated (zero downtime)")
+    parser.add_argument("--migrate-format", choices=EMBEDDING_FORMATS,
+                        help="convert the embeddings already stored in Mongo to this format and exit")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="with --migrate-format: only report size and recall, do not write")
+    parser.add_argument("--recommendations", action="store_true",
+                        help="recompute the per-student module recommendations from the stored embeddings and exit")
+    parser.add_argument("--top-n", type=int, default=20,
+                        help="with --recommendations: modules stored per student (default: 20)")
+    args = parser.parse_args()
+    if args.swap and args.incremental:
+        parser.error("--swap and --incremental cannot be combined")
+
+    if args.recommendations:
+        build_student_recommendations(args.top_n)
+    elif args.migrate_format:
+        migrate_embedding_format(args.migrate_format, dry_run=args.dry_run)
+    else:
+        generate_and_store_embeddings(args.embedding_format, args.sql_embeddings,
+                                      args.batch_size, not args.no_normalize, args.workers, args.incremental,
+                                      args.chunk_size, args.write_batch_size, args.entity, args.restart,
+                                      args.embedding_store, args.swap)
\ No newline at end of file
@@ -1,4 +1,5 @@
 # website/__init__.py
+import time
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_pymongo import PyMongo
@@ -10,6 +11,7 @@ mongo = PyMongo()
 
 def create_app(config_class=DevelopmentConfig):
     """Creates and configures the Flask app."""
+    started = time.perf_counter()
     
     # We use 'website.templates' and 'website.static'
     app = Flask(__name__, template_folder='templates', static_folder='static')
@@ -33,5 +35,16 @@ def create_app(config_class=DevelopmentConfig):
     # with app.app_context():
     #     db.create_all()
 
-    print("Flask app created and databases initialized.")
+    # 6. Optionally load the AI model in the background so the first search doesn't stall
+    if app.config.get('PRELOAD_MODEL'):
+        from .services.warmup import start_background_warmup
+        start_background_warmup(app)
+
+    # 7. Background worker that re-embeds modules queued by create/update (EMBEDDING_JOBS_WORKER)
+    if app.config.get('EMBEDDING_JOBS_WORKER'):
+        from .services.embedding_jobs import start_embedding_worker
+        from .services.services import process_embedding_jobs
+        start_embedding_worker(app, process_embedding_jobs)
+
+    print(f"Flask app created and databases initialized ({time.perf_counter() - started:.3f}s).")
     return app
\ No newline at end of file
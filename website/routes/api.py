@@ -1,14 +1,22 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from website import mongo
 import re
-import difflib
-from sentence_transformers import SentenceTransformer
-from ..services import services_mongo
+from ..services import embeddings
+from ..services.warmup import readiness
+from ..services.hybrid_search import timing_stats, server_timing_header
+from ..services.search_cache import get_search_cache, catalog_version
 from ..services.services import (
+    search_modules_by_query,
+    hybrid_search_modules,
+    search_modules_page,
+    autocomplete,
     get_module_data,
     get_module_details_by_id,
+    get_similar_modules,
+    get_embedding_job_stats,
     get_student_data,
     get_student_enrollments,
+    get_student_recommendations,
     enroll_student_in_module,
     get_user_data,
     get_student_details_by_user_id,
@@ -45,6 +53,12 @@ def switch_database():
     
     return jsonify({"message": f"Database switched to {provider}"})
 
+# Readiness probe: 200 once the encoder is loaded and both databases answer, 503 otherwise.
+@api_bp.route('/health/ready', methods=['GET'])
+def health_ready():
+    status = readiness()
+    return jsonify(status), (200 if status["ready"] else 503)
+
 # =========================================================
 # PUBLIC ROUTES
 # =========================================================
@@ -65,39 +79,142 @@ def get_module(module_id):
         return jsonify(module)
     return jsonify({"error": "Module not found"}), 404
 
+# Related modules for the module detail page, read from the precomputed kNN graph (no vector search per view).
+@api_bp.route('/modules/<string:module_id>/similar', methods=['GET'])
+def get_similar(module_id):
+    try:
+        limit = _bounded_int_arg('limit', 5, 1, current_app.config.get('SIMILAR_MODULES_K', 10))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    similar = get_similar_modules(module_id, limit)
+    if similar is None:
+        return jsonify({"error": "Module not found or has no embedding"}), 404
+    return jsonify(similar)
+
 @api_bp.route('/students', methods=['GET'])
 def get_students():
     """Retrieve all student data (for login)."""
     all_students = get_student_data()
     return jsonify(all_students)
 
-# Semantic Search function, it always calls MongoDB due to the embeddings stored in it.
+# Semantic Search function, served by the active provider (Mongo embeddings or the SQL module_embeddings table).
 @api_bp.route('/search', methods=['GET'])
 def search_modules():
     # This query parameters are optional and are extracted if provided.
     # example query from frontend: /api/search?term=Y1T2&q=all HTTP/1.1
+    # mode=hybrid fuses keyword (BM25) and vector results; fusion=rrf (default) or weighted
+    # limit / num_candidates size the ranking (num_candidates is the Atlas $vectorSearch pool).
+    # page_size or cursor switch to paged responses: {"results", "total", "next_cursor"}
     original_query = request.args.get('q', '').strip()
     term = request.args.get('term', None)
     level = request.args.get('level', None)
     instructor = request.args.get('instructor', None)
     student_major = request.args.get('major', None)
+    mode = request.args.get('mode', 'semantic')
+    fusion = request.args.get('fusion', 'rrf')
+    cursor = request.args.get('cursor')
+    paged = bool(cursor) or 'page_size' in request.args
 
-    if not original_query:
+    try:
+        max_limit = current_app.config.get('SEARCH_MAX_LIMIT', 500)
+        limit = _bounded_int_arg('limit', 100 if paged else 10, 1, max_limit)
+        num_candidates = _bounded_int_arg('num_candidates', None, limit, 10000)
+        page_size = _bounded_int_arg('page_size', 10, 1, current_app.config.get('SEARCH_MAX_PAGE_SIZE', 50))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not original_query and not cursor:
         return jsonify({"error": "No query provided"}), 400
 
     try:
-        # Calls the service_mongo.py. The service includes model loading internally.
-        results = services_mongo.search_modules_by_query(
+        if paged:
+            try:
+                return jsonify(search_modules_page(
+                    original_query=original_query,
+                    term=term,
+                    level=level,
+                    instructor=instructor,
+                    student_major=student_major,
+                    mode=mode,
+                    fusion=fusion,
+                    page_size=page_size,
+                    limit=limit,
+                    num_candidates=num_candidates,
+                    cursor=cursor
+                ))
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
+        if mode == 'hybrid':
+            results, timings = hybrid_search_modules(
+                original_query=original_query,
+                term=term,
+                level=level,
+                instructor=instructor,
+                student_major=student_major,
+                fusion=fusion,
+                limit=limit
+            )
+            response = jsonify(results)
+            response.headers['Server-Timing'] = server_timing_header(timings)
+            return response
+
+        # Calls services.py. Both providers load the model internally.
+        results = search_modules_by_query(
             original_query=original_query, 
             term=term, 
             level=level, 
             instructor=instructor, 
-            student_major=student_major
+            student_major=student_major,
+            limit=limit,
+            num_candidates=num_candidates
         )
         return jsonify(results)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _bounded_int_arg(name, default, low, high):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+    if not low <= number <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return number
+
+# Typeahead suggestions (module codes, module names, instructor names) from an in-memory prefix index.
+# example: /api/autocomplete?q=data&limit=8
+@api_bp.route('/autocomplete', methods=['GET'])
+def autocomplete_suggestions():
+    query = request.args.get('q', '')
+    try:
+        limit = _bounded_int_arg('limit', 8, 1, 50)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(autocomplete(query, limit))
+
+# Cache statistics for the search path.
+@api_bp.route('/search/stats', methods=['GET'])
+def search_stats():
+    return jsonify({
+        "search_cache": dict(get_search_cache().stats(), catalog_version=catalog_version()),
+        "embedding_cache": embeddings.get_query_embedding_cache().stats(),
+        "embedding_store": embeddings.embedding_store_stats(),
+        "encoder": embeddings.get_batching_encoder().stats(),
+        "hybrid_timings": timing_stats()
+    })
+
+# Re-embed job queue of the active provider: depth, age of the oldest pending job, worker throughput and lag.
+@api_bp.route('/embedding_jobs/stats', methods=['GET'])
+def embedding_job_stats():
+    try:
+        return jsonify(get_embedding_job_stats())
+    except Exception as e:
+        return jsonify({"error": f"Embedding job queue unavailable: {e}"}), 503
+
 
 
 # =========================================================
@@ -164,6 +281,18 @@ def api_get_student_details(user_id):
         return jsonify(student_data)
     return jsonify({"error": "Student not found"}), 404
 
+# Returns the precomputed module recommendations of a student (generate_vectors.py --recommendations).
+@api_bp.route('/students/<int:student_id>/recommendations', methods=['GET'])
+def api_get_student_recommendations(student_id):
+    try:
+        limit = _bounded_int_arg('limit', 10, 1, 50)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    recommendations = get_student_recommendations(student_id, limit)
+    if recommendations is None:
+        return jsonify({"error": "No recommendations computed for this student"}), 404
+    return jsonify(recommendations)
+
 # Returns all  instructors.
 @api_bp.route('/instructors', methods=['GET'])
 def get_instructors():
@@ -0,0 +1,296 @@
+import io
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# assignment / scoring is done in blocks of rows so 1M x nlist never materialises at once
+_BLOCK_ROWS = 65536
+
+
+class IVFFlatIndex:
+    """
+    Inverted-file ANN index over L2-normalised vectors (cosine similarity).
+    Spherical k-means splits the space into `nlist` cells; each cell stores its vectors
+    uncompressed ("flat"). A query scores the centroids, then only the vectors in the
+    `nprobe` closest cells. Vectors can be added, replaced and removed without retraining.
+    """
+
+    def __init__(self, centroids: np.ndarray, nprobe: int = 8):
+        self.centroids = _normalise(np.ascontiguousarray(centroids, dtype=np.float32))
+        self.dim = self.centroids.shape[1]
+        self.nprobe = nprobe
+        nlist = self.centroids.shape[0]
+        self._list_vectors: List[np.ndarray] = [np.empty((0, self.dim), dtype=np.float32) for _ in range(nlist)]
+        self._list_labels: List[np.ndarray] = [np.empty(0, dtype=np.int64) for _ in range(nlist)]
+        # labels are internal ints; removed labels are never reused
+        self._ids: List[Optional[str]] = []
+        self._label_of: Dict[str, int] = {}
+        self._list_of: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.built_at = time.time()
+
+    @property
+    def nlist(self) -> int:
+        return self.centroids.shape[0]
+
+    def __len__(self):
+        return len(self._label_of)
+
+    def __contains__(self, item_id: str):
+        return item_id in self._label_of
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, nlist: Optional[int] = None, nprobe: int = 8,
+              iterations: int = 10, sample_size: int = 100_000, seed: int = 0):
+        """Spherical k-means on (a sample of) `vectors`. nlist defaults to ~4 * sqrt(n)."""
+        n = vectors.shape[0]
+        if n == 0:
+            raise ValueError("Cannot train an IVF index without vectors")
+        nlist = max(1, min(nlist or int(4 * np.sqrt(n)), n))
+
+        rng = np.random.default_rng(seed)
+        rows = np.sort(rng.choice(n, size=min(n, max(sample_size, nlist)), replace=False))
+        sample = _normalise(np.asarray(vectors[rows], dtype=np.float32))
+        centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = _nearest(sample, centroids)
+            # group rows by cell and sum each run (much faster than np.add.at)
+            order = np.argsort(assignment, kind='stable')
+            cells, starts = np.unique(assignment[order], return_index=True)
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+            # empty cells keep their previous centroid
+            centroids[cells] = _normalise(sums)
+
+        return cls(centroids, nprobe=nprobe)
+
+    @classmethod
+    def build(cls, ids: List[str], vectors: np.ndarray, nlist: Optional[int] = None, nprobe: int = 8):
+        index = cls.train(vectors, nlist=nlist, nprobe=nprobe)
+        index.add(ids, vectors)
+        return index
+
+    def add(self, ids: Iterable[str], vectors: np.ndarray):
+        """Inserts vectors; an id that is already present is replaced."""
+        ids = list(ids)
+        if not ids:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        # the nearest centroid does not depend on the row's norm, so rows are normalised per cell below
+        assignment = _nearest(vectors, self.centroids)
+        order = np.argsort(assignment, kind='stable')
+        cells, starts = np.unique(assignment[order], return_index=True)
+
+        with self._lock:
+            self._remove_locked([i for i in ids if i in self._label_of])
+            first = len(self._ids)
+            self._ids.extend(ids)
+            for offset, (item_id, cell) in enumerate(zip(ids, assignment.tolist())):
+                self._label_of[item_id] = first + offset
+                self._list_of[first + offset] = cell
+            for cell, rows in zip(cells.tolist(), np.split(order, starts[1:])):
+                self._list_vectors[cell] = np.vstack([self._list_vectors[cell], _normalise(vectors[rows])])
+                self._list_labels[cell] = np.concatenate([self._list_labels[cell], rows + first])
+
+    def remove(self, ids: Iterable[str]):
+        with self._lock:
+            self._remove_locked([i for i in ids if i in self._label_of])
+
+    def _remove_locked(self, ids: List[str]):
+        by_cell: Dict[int, List[int]] = {}
+        for item_id in ids:
+            label = self._label_of.pop(item_id)
+            self._ids[label] = None
+            by_cell.setdefault(self._list_of.pop(label), []).append(label)
+        for cell, labels in by_cell.items():
+            keep = ~np.isin(self._list_labels[cell], labels)
+            self._list_vectors[cell] = self._list_vectors[cell][keep]
+            self._list_labels[cell] = self._list_labels[cell][keep]
+
+    def search(self, query_vector, k: int = 10, nprobe: Optional[int] = None,
+               allowed: Optional[Callable[[str], bool]] = None) -> List[Tuple[str, float]]:
+        """
+        Returns [(id, cosine)] best first from the `nprobe` nearest cells.
+        `allowed` post-filters candidates; the caller should fall back to exact search
+        when the filter is very selective, since the probed cells may hold too few matches.
+        """
+        if not self._label_of or k <= 0:
+            return []
+        query = _normalise(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))[0]
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+
+        centroid_scores = self.centroids @ query
+        cells = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe] if nprobe < self.nlist else np.arange(self.nlist)
+        cells = [c for c in cells if self._list_labels[c].size]
+        if not cells:
+            return []
+
+        labels = np.concatenate([self._list_labels[c] for c in cells])
+        scores = np.concatenate([self._list_vectors[c] @ query for c in cells])
+
+        if allowed is None:
+            top = np.argpartition(-scores, k - 1)[:k] if k < scores.size else np.arange(scores.size)
+            order = top[np.argsort(-scores[top], kind='stable')]
+            return [(self._ids[labels[i]], float(scores[i])) for i in order]
+
+        results = []
+        for i in np.argsort(-scores, kind='stable'):
+            item_id = self._ids[labels[i]]
+            if allowed(item_id):
+                results.append((item_id, float(scores[i])))
+                if len(results) == k:
+                    break
+        return results
+
+    def sync(self, ids: List[str], vectors: np.ndarray) -> bool:
+        """
+        Brings the index in line with the authoritative (ids, vectors): inserts new ids,
+        re-inserts ids whose vector changed and removes ids that are gone. Returns True if anything changed.
+        """
+        vectors = _normalise(np.asarray(vectors, dtype=np.float32)) if len(ids) else vectors
+        rows_of = {item_id: row for row, item_id in enumerate(ids)}
+        seen = np.zeros(len(ids), dtype=bool)
+        gone, changed_rows = [], []
+
+        # compare cell by cell so the stored vectors are read as contiguous blocks
+        for cell in range(self.nlist):
+            labels = self._list_labels[cell]
+            if not labels.size:
+                continue
+            cell_ids = [self._ids[label] for label in labels]
+            rows = np.array([rows_of.get(item_id, -1) for item_id in cell_ids])
+            present = rows >= 0
+            gone.extend(item_id for item_id, keep in zip(cell_ids, present) if not keep)
+            if present.any():
+                rows = rows[present]
+                seen[rows] = True
+                drift = np.abs(self._list_vectors[cell][present] - vectors[rows]).max(axis=1)
+                changed_rows.extend(rows[drift > 1e-5].tolist())
+        changed_rows.extend(np.flatnonzero(~seen).tolist())
+
+        if gone:
+            self.remove(gone)
+        if changed_rows:
+            self.add([ids[r] for r in changed_rows], vectors[changed_rows])
+        return bool(gone or changed_rows)
+
+    def save(self, path: str):
+        """Writes the index as one .npz file (atomically, via a temporary file)."""
+        with self._lock:
+            cells = [np.full(v.shape[0], c, dtype=np.int32) for c, v in enumerate(self._list_vectors)]
+            ids = [self._ids[label] for labels in self._list_labels for label in labels]
+            payload = dict(
+                centroids=self.centroids,
+                nprobe=np.array(self.nprobe),
+                vectors=np.vstack(self._list_vectors),
+                cells=np.concatenate(cells),
+                ids=np.array(ids, dtype=str),
+            )
+        buffer = io.BytesIO()
+        np.savez(buffer, **payload)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # a temp file unique to this writer, so workers sharing ANN_INDEX_DIR never write or replace each other's
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(buffer.getvalue())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path, allow_pickle=False) as data:
+            index = cls(data["centroids"], nprobe=int(data["nprobe"]))
+            ids, vectors, cells = data["ids"].tolist(), data["vectors"], data["cells"]
+        # stored vectors keep their cell, so loading needs no re-assignment
+        labels = np.arange(len(ids), dtype=np.int64)
+        index._ids = list(ids)
+        index._label_of = {item_id: i for i, item_id in enumerate(ids)}
+        index._list_of = dict(zip(range(len(ids)), cells.tolist()))
+        for cell in range(index.nlist):
+            rows = cells == cell
+            index._list_vectors[cell] = np.ascontiguousarray(vectors[rows])
+            index._list_labels[cell] = labels[rows]
+        return index
+
+
+class SyncedANNIndex:
+    """
+    Holds an IVFFlatIndex that follows a provider's ModuleVectorIndex: trained on first use
+    (or loaded from `path`), then synced incrementally whenever the module index is rebuilt.
+    """
+
+    def __init__(self, get_module_index: Callable, path: Optional[str] = None, nprobe: int = 8):
+        self._get_module_index = get_module_index
+        self.path = path
+        self.nprobe = nprobe
+        self._index: Optional[IVFFlatIndex] = None
+        self._synced_with = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[IVFFlatIndex]:
+        module_index = self._get_module_index()
+        if self._index is not None and self._synced_with is module_index:
+            return self._index
+        with self._lock:
+            if self._index is None or self._synced_with is not module_index:
+                self._refresh(module_index)
+            return self._index
+
+    def _refresh(self, module_index):
+        if len(module_index) == 0:
+            self._index, self._synced_with = None, module_index
+            return
+
+        index, changed = self._index, False
+        if index is None and self.path and os.path.exists(self.path):
+            try:
+                index = IVFFlatIndex.load(self.path)
+                print(f"ANN index loaded from {self.path} ({len(index)} vectors).")
+            except Exception as e:
+                print(f"ANN index at {self.path} unreadable ({e}), retraining.")
+                index = None
+        if index is not None and index.dim != module_index.matrix.shape[1]:
+            index = None
+
+        if index is None:
+            index = IVFFlatIndex.build(module_index.module_ids, module_index.matrix, nprobe=self.nprobe)
+            changed = True
+            print(f"ANN index trained: {len(index)} vectors in {index.nlist} lists.")
+        else:
+            changed = index.sync(module_index.module_ids, module_index.matrix)
+        index.nprobe = self.nprobe
+
+        if changed and self.path:
+            index.save(self.path)
+        self._index, self._synced_with = index, module_index
+
+
+def ann_index_path(provider: str) -> Optional[str]:
+    """Where a provider persists its index (ANN_INDEX_DIR); None keeps it in memory only."""
+    from flask import current_app
+    directory = current_app.config.get('ANN_INDEX_DIR')
+    return os.path.join(directory, f"modules-{provider}.ivf.npz") if directory else None
+
+
+def _normalise(matrix: np.ndarray) -> np.ndarray:
+    if matrix.size == 0:
+        return matrix
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for every row, computed block by block."""
+    out = np.empty(vectors.shape[0], dtype=np.int64)
+    for start in range(0, vectors.shape[0], _BLOCK_ROWS):
+        block = vectors[start:start + _BLOCK_ROWS]
+        out[start:start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+    return out
@@ -0,0 +1,215 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from flask import current_app
+
+# a short prefix such as "a" can match most of the catalog; stop scanning after this many keys
+_MAX_SCANNED = 500
+
+
+def _normalise(value: Optional[str]) -> str:
+    return " ".join((value or "").lower().split())
+
+
+def _word_starts(label: str) -> List[str]:
+    """'database systems' -> ['database systems', 'systems'] so any word can start a match."""
+    words = label.split(" ")
+    return [" ".join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+class AutocompleteIndex:
+    """
+    Prefix index over module codes, module names and instructor names.
+    Every suggestion is stored under its lower-cased label and under each later word start,
+    in one sorted list of (key, word_position, entry) tuples; a lookup is a bisect to the
+    first key >= prefix followed by a scan of the contiguous run of matching keys.
+    Entries are added, replaced and removed in place as modules and users change.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[str, int, int]] = []
+        self._entries: Dict[int, Dict] = {}
+        self._entry_of: Dict[Tuple[str, object], int] = {}
+        self._keys_of: Dict[int, List[Tuple[str, int, int]]] = {}
+        self._next_entry = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def upsert(self, kind: str, ref_id, text: str, labels: Iterable[str]):
+        """Indexes one suggestion (`kind` + `ref_id` identify it) under each of `labels`."""
+        with self._lock:
+            self._remove_locked(kind, ref_id)
+            for key in self._add_locked(kind, ref_id, text, labels):
+                insort(self._keys, key)
+
+    def bulk_load(self, items: Iterable[Tuple[str, object, str, Iterable[str]]]):
+        """Fills an empty index from (kind, ref_id, text, labels) suggestions with one sort, not an insort per key."""
+        with self._lock:
+            for kind, ref_id, text, labels in items:
+                self._keys.extend(self._add_locked(kind, ref_id, text, labels))
+            self._keys.sort()
+
+    def _add_locked(self, kind, ref_id, text, labels) -> List[Tuple[str, int, int]]:
+        # registers the entry and returns its keys; the caller places them in self._keys
+        entry = self._next_entry
+        self._next_entry += 1
+        keys = []
+        for label in labels:
+            for position, key in enumerate(_word_starts(_normalise(label))):
+                keys.append((key, position, entry))
+        if keys:
+            self._entries[entry] = {"type": kind, "id": ref_id, "text": text}
+            self._entry_of[(kind, ref_id)] = entry
+            self._keys_of[entry] = keys
+        return keys
+
+    def remove(self, kind: str, ref_id):
+        with self._lock:
+            self._remove_locked(kind, ref_id)
+
+    def contains(self, kind: str, ref_id) -> bool:
+        return (kind, ref_id) in self._entry_of
+
+    def _remove_locked(self, kind, ref_id):
+        entry = self._entry_of.pop((kind, ref_id), None)
+        if entry is None:
+            return
+        for key in self._keys_of.pop(entry):
+            i = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+        del self._entries[entry]
+
+    def search(self, prefix: str, limit: int = 8) -> List[Dict]:
+        """Suggestions whose label, or a word in it, starts with `prefix`; whole-label matches rank first."""
+        prefix = _normalise(prefix)
+        if not prefix or limit <= 0:
+            return []
+
+        best: Dict[int, Tuple[int, int]] = {}
+        with self._lock:
+            i = bisect_left(self._keys, (prefix,))
+            end = min(len(self._keys), i + _MAX_SCANNED)
+            while i < end:
+                key, position, entry = self._keys[i]
+                if not key.startswith(prefix):
+                    break
+                rank = (min(position, 1), len(self._entries[entry]["text"]))
+                if entry not in best or rank < best[entry]:
+                    best[entry] = rank
+                i += 1
+            ranked = sorted(best, key=lambda e: (best[e], self._entries[e]["text"]))
+            return [dict(self._entries[e]) for e in ranked[:limit]]
+
+
+class NameIndexEngine:
+    """
+    A name index (AutocompleteIndex, or fuzzy.FuzzyIndex) built lazily from `load()`
+    ((modules, instructors) rows) and kept in sync by the write hooks. After `max_age` seconds
+    (writes made by other processes are only seen on a rebuild) a background thread rebuilds it
+    while searches keep using the old index; hook changes made meanwhile are replayed on the new
+    index before it is swapped in.
+    """
+
+    def __init__(self, load, index_class=AutocompleteIndex, max_age: Optional[float] = None):
+        self._load = load
+        self._index_class = index_class
+        self._max_age = max_age
+        self._index = None
+        self._built_at = 0.0
+        self._rebuilding = False
+        self._pending: List[Callable] = []
+        self._lock = threading.Lock()
+
+    def _expired(self) -> bool:
+        return bool(self._max_age) and (time.time() - self._built_at) > self._max_age
+
+    def _build(self):
+        modules, instructors = self._load()
+        index = self._index_class()
+        index.bulk_load([_module_entry(*row) for row in modules] + [_instructor_entry(*row) for row in instructors])
+        print(f"{self._index_class.__name__} built with {len(index)} entries.")
+        return index
+
+    def _get(self):
+        index = self._index
+        if index is None:
+            # first use: nothing to serve yet, so this request builds it
+            with self._lock:
+                if self._index is None:
+                    self._index = self._build()
+                    self._built_at = time.time()
+                return self._index
+        if self._expired():
+            self._start_rebuild()
+        return index
+
+    def _start_rebuild(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+            self._pending = []
+        app = current_app._get_current_object()
+        threading.Thread(target=self._rebuild, args=(app,), name="name-index-rebuild", daemon=True).start()
+
+    def _rebuild(self, app):
+        try:
+            with app.app_context():
+                index = self._build()
+        except Exception as e:
+            print(f"{self._index_class.__name__} rebuild failed, keeping the current index: {e}")
+            index = None
+        with self._lock:
+            if index is not None:
+                for change in self._pending:
+                    change(index)
+                self._index = index
+            # a failed rebuild is retried after another max_age
+            self._built_at = time.time()
+            self._rebuilding = False
+            self._pending = []
+
+    def _apply(self, change: Callable):
+        # applies a write-hook change now, and again to an index being rebuilt
+        with self._lock:
+            index = self._index
+            if self._rebuilding:
+                self._pending.append(change)
+        if index is not None:
+            change(index)
+
+    def search(self, query: str, *args, **kwargs) -> List:
+        return self._get().search(query, *args, **kwargs)
+
+    def index_module(self, module_id, module_name):
+        self._apply(lambda index: index.upsert(*_module_entry(module_id, module_name)))
+
+    def remove_module(self, module_id):
+        self._apply(lambda index: index.remove("module", module_id))
+
+    def index_instructor(self, user_id, first_name, last_name):
+        self._apply(lambda index: index.upsert(*_instructor_entry(user_id, first_name, last_name)))
+
+    def update_user(self, user_id, first_name, last_name):
+        # only users already indexed as instructors are suggested
+        def change(index):
+            if index.contains("instructor", user_id):
+                index.upsert(*_instructor_entry(user_id, first_name, last_name))
+        self._apply(change)
+
+    def remove_user(self, user_id):
+        self._apply(lambda index: index.remove("instructor", user_id))
+
+
+def _module_entry(module_id, module_name):
+    text = f"{module_id} {module_name}" if module_name else module_id
+    return "module", module_id, text, [module_id, module_name or ""]
+
+
+def _instructor_entry(user_id, first_name, last_name):
+    name = f"{first_name or ''} {last_name or ''}".strip()
+    return "instructor", user_id, name, [name]
@@ -0,0 +1,70 @@
+import numpy as np
+from bson.binary import Binary
+from typing import Dict, Any
+
+# 'float32' keeps the plain BSON array (required by the Atlas $vectorSearch backend);
+# 'float16' / 'int8' store packed BSON Binary and are read back with np.frombuffer.
+EMBEDDING_FORMATS = ('float32', 'float16', 'int8')
+
+
+def pack_embedding(vector, fmt: str = 'float32') -> Dict[str, Any]:
+    """Returns the document fields that store `vector` in the requested format."""
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+
+    if fmt == 'float32':
+        return {"embedding": vector.tolist(), "embedding_format": "float32"}
+
+    if fmt == 'float16':
+        return {"embedding": Binary(vector.astype(np.float16).tobytes()), "embedding_format": "float16"}
+
+    if fmt == 'int8':
+        # symmetric per-vector scale: v ~= q * scale, q in [-127, 127]
+        peak = float(np.max(np.abs(vector))) if vector.size else 0.0
+        scale = peak / 127.0 if peak > 0 else 1.0
+        quantized = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+        return {"embedding": Binary(quantized.tobytes()), "embedding_format": "int8", "embedding_scale": scale}
+
+    raise ValueError(f"Unknown embedding format: {fmt}")
+
+
+def embedding_view(doc: Dict[str, Any]):
+    """Zero-copy view of the stored embedding in its stored dtype, plus the int8 scale (or None)."""
+    raw = doc.get('embedding')
+    fmt = doc.get('embedding_format') or ('float32' if isinstance(raw, list) else None)
+
+    if raw is None:
+        return None, None
+    if fmt == 'float16':
+        return np.frombuffer(raw, dtype=np.float16), None
+    if fmt == 'int8':
+        return np.frombuffer(raw, dtype=np.int8), doc.get('embedding_scale', 1.0)
+    return np.asarray(raw, dtype=np.float32), None
+
+
+def unpack_embedding(doc: Dict[str, Any]):
+    """Decodes a stored embedding (any format) to a float32 vector, or None if the doc has none."""
+    view, scale = embedding_view(doc)
+    if view is None:
+        return None
+    if scale is not None:
+        return view.astype(np.float32) * np.float32(scale)
+    return view.astype(np.float32, copy=False)
+
+
+def recall_at_k(reference: np.ndarray, candidate: np.ndarray, k: int = 10, max_queries: int = 1000) -> float:
+    """
+    Mean overlap between the exact cosine top-k of `reference` (float32) and of `candidate`
+    (the same rows after a lossy round trip), using the reference rows themselves as queries.
+    """
+    ref = reference / np.maximum(np.linalg.norm(reference, axis=1, keepdims=True), 1e-12)
+    cand = candidate / np.maximum(np.linalg.norm(candidate, axis=1, keepdims=True), 1e-12)
+    n = ref.shape[0]
+    k = min(k, n)
+    if k == 0:
+        return 1.0
+
+    queries = ref[np.random.default_rng(0).choice(n, size=min(n, max_queries), replace=False)]
+    exact = np.argpartition(-(queries @ ref.T), k - 1, axis=1)[:, :k]
+    approx = np.argpartition(-(queries @ cand.T), k - 1, axis=1)[:, :k]
+    hits = sum(len(np.intersect1d(e, a, assume_unique=True)) for e, a in zip(exact, approx))
+    return hits / (k * queries.shape[0])
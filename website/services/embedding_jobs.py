@@ -0,0 +1,229 @@
+import threading
+import time
+import uuid
+from flask import current_app
+from sqlalchemy import text, bindparam
+from sqlalchemy.exc import IntegrityError
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from .. import db
+
+# set by enqueue() so the worker picks new jobs up without waiting for the next poll
+_wake = threading.Event()
+
+# longest wait between retries while the queue itself keeps failing (e.g. table not created)
+_MAX_BACKOFF_SECONDS = 300
+
+
+class MongoJobStore:
+    """Jobs in a Mongo collection, one document per (entity, ref_id); re-enqueueing an id bumps updated_at."""
+
+    def __init__(self, get_collection: Callable):
+        self._get_collection = get_collection
+
+    def enqueue(self, entity: str, ref_ids: Sequence, now: float):
+        jobs = self._get_collection()
+        for ref_id in ref_ids:
+            jobs.update_one(
+                {"_id": f"{entity}:{ref_id}"},
+                {"$set": {"entity": entity, "ref_id": ref_id, "updated_at": now, "attempts": 0, "last_error": None},
+                 "$setOnInsert": {"enqueued_at": now, "claim": None, "claimed_until": None}},
+                upsert=True
+            )
+
+    def claim(self, limit: int, lease: float, max_attempts: int, now: float) -> Tuple[str, List[Dict]]:
+        jobs = self._get_collection()
+        available = {"attempts": {"$lt": max_attempts},
+                     "$or": [{"claimed_until": None}, {"claimed_until": {"$lt": now}}]}
+        keys = [d["_id"] for d in jobs.find(available, {"_id": 1}).sort("enqueued_at", 1).limit(limit)]
+        token = uuid.uuid4().hex
+        if keys:
+            jobs.update_many({"_id": {"$in": keys}, **available}, {"$set": {"claim": token, "claimed_until": now + lease}})
+        return token, [{"key": d["_id"], "ref_id": d["ref_id"], "enqueued_at": d["enqueued_at"], "updated_at": d["updated_at"]}
+                       for d in jobs.find({"claim": token})]
+
+    def complete(self, token: str, jobs: List[Dict]):
+        collection = self._get_collection()
+        for job in jobs:
+            # a job re-enqueued while it was being processed keeps its newer updated_at and stays queued
+            collection.delete_one({"_id": job["key"], "updated_at": job["updated_at"]})
+        collection.update_many({"claim": token}, {"$set": {"claim": None, "claimed_until": None}})
+
+    def fail(self, token: str, error: str):
+        self._get_collection().update_many(
+            {"claim": token},
+            {"$inc": {"attempts": 1}, "$set": {"last_error": error, "claim": None, "claimed_until": None}}
+        )
+
+    def counts(self, max_attempts: int) -> Tuple[int, int, Optional[float]]:
+        jobs = self._get_collection()
+        pending = jobs.count_documents({"attempts": {"$lt": max_attempts}})
+        failed = jobs.count_documents({"attempts": {"$gte": max_attempts}})
+        oldest = next(iter(jobs.find({"attempts": {"$lt": max_attempts}}, {"enqueued_at": 1}).sort("enqueued_at", 1).limit(1)), None)
+        return pending, failed, oldest["enqueued_at"] if oldest else None
+
+
+class SQLJobStore:
+    """Jobs in the SQL embedding_jobs table (see DATABASE-SQL-SCRIPT.sql), keyed by job_key = 'entity:ref_id'."""
+
+    def _run(self, fn):
+        try:
+            result = fn()
+            db.session.commit()
+            return result
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def enqueue(self, entity: str, ref_ids: Sequence, now: float):
+        def insert_or_touch():
+            for ref_id in ref_ids:
+                params = {"key": f"{entity}:{ref_id}", "entity": entity, "ref": str(ref_id), "now": now}
+                touched = db.session.execute(text(
+                    "UPDATE embedding_jobs SET updated_at=:now, attempts=0, last_error=NULL WHERE job_key=:key"
+                ), params).rowcount
+                if not touched:
+                    db.session.execute(text("""
+                        INSERT INTO embedding_jobs (job_key, entity, ref_id, enqueued_at, updated_at, attempts)
+                        VALUES (:key, :entity, :ref, :now, :now, 0)
+                    """), params)
+        try:
+            self._run(insert_or_touch)
+        except IntegrityError:
+            # another worker inserted the same job between our UPDATE and INSERT
+            self._run(insert_or_touch)
+
+    def claim(self, limit: int, lease: float, max_attempts: int, now: float) -> Tuple[str, List[Dict]]:
+        token = uuid.uuid4().hex
+        available = "attempts < :max AND (claimed_until IS NULL OR claimed_until < :now)"
+
+        def claim_rows():
+            keys = [r.job_key for r in db.session.execute(text(
+                f"SELECT job_key FROM embedding_jobs WHERE {available} ORDER BY enqueued_at LIMIT :n"
+            ), {"max": max_attempts, "now": now, "n": limit})]
+            if keys:
+                db.session.execute(text(
+                    f"UPDATE embedding_jobs SET claim=:token, claimed_until=:until WHERE job_key IN :keys AND {available}"
+                ).bindparams(bindparam("keys", expanding=True)),
+                    {"token": token, "until": now + lease, "keys": keys, "max": max_attempts, "now": now})
+            return [
+                {"key": r.job_key, "ref_id": r.ref_id, "enqueued_at": r.enqueued_at, "updated_at": r.updated_at}
+                for r in db.session.execute(text(
+                    "SELECT job_key, ref_id, enqueued_at, updated_at FROM embedding_jobs WHERE claim=:token"
+                ), {"token": token})
+            ]
+        return token, self._run(claim_rows)
+
+    def complete(self, token: str, jobs: List[Dict]):
+        def delete_done():
+            if jobs:
+                db.session.execute(text("DELETE FROM embedding_jobs WHERE job_key=:key AND updated_at=:updated_at"),
+                                   [{"key": j["key"], "updated_at": j["updated_at"]} for j in jobs])
+            db.session.execute(text("UPDATE embedding_jobs SET claim=NULL, claimed_until=NULL WHERE claim=:token"),
+                               {"token": token})
+        self._run(delete_done)
+
+    def fail(self, token: str, error: str):
+        self._run(lambda: db.session.execute(text("""
+            UPDATE embedding_jobs SET attempts=attempts+1, last_error=:error, claim=NULL, claimed_until=NULL
+            WHERE claim=:token
+        """), {"token": token, "error": error[:1000]}))
+
+    def counts(self, max_attempts: int) -> Tuple[int, int, Optional[float]]:
+        row = self._run(lambda: db.session.execute(text("""
+            SELECT SUM(CASE WHEN attempts < :max THEN 1 ELSE 0 END) AS pending,
+                   SUM(CASE WHEN attempts >= :max THEN 1 ELSE 0 END) AS failed,
+                   MIN(CASE WHEN attempts < :max THEN enqueued_at END) AS oldest
+            FROM embedding_jobs
+        """), {"max": max_attempts}).one())
+        return int(row.pending or 0), int(row.failed or 0), row.oldest
+
+
+class EmbeddingJobQueue:
+    """
+    Persisted queue of re-embed jobs for one provider. Writes enqueue ids; run_once() claims a batch
+    (a lease, so several web processes can share the queue), passes the ids to `process` in one call
+    and deletes the jobs, or records the error and retries up to EMBEDDING_JOBS_MAX_ATTEMPTS times.
+    """
+
+    def __init__(self, store, process: Callable[[List], None], entity: str = "module"):
+        self._store = store
+        self._process = process
+        self.entity = entity
+        self._metrics = {"processed": 0, "failed_batches": 0, "batches": 0, "last_batch_size": 0,
+                         "last_batch_seconds": None, "last_lag_seconds": None, "max_lag_seconds": None,
+                         "last_error": None}
+        self._lock = threading.Lock()
+
+    def enqueue(self, ref_ids: Sequence):
+        self._store.enqueue(self.entity, list(ref_ids), time.time())
+        _wake.set()
+
+    def run_once(self, limit: int = 64) -> int:
+        """Processes up to `limit` jobs; returns how many were completed."""
+        max_attempts = current_app.config.get('EMBEDDING_JOBS_MAX_ATTEMPTS', 5)
+        token, jobs = self._store.claim(limit, current_app.config.get('EMBEDDING_JOBS_LEASE_SECONDS', 300),
+                                        max_attempts, time.time())
+        if not jobs:
+            return 0
+
+        started = time.perf_counter()
+        try:
+            self._process(list(dict.fromkeys(job["ref_id"] for job in jobs)))
+        except Exception as e:
+            self._store.fail(token, str(e))
+            with self._lock:
+                self._metrics["failed_batches"] += 1
+                self._metrics["last_error"] = str(e)
+            print(f"Embedding job batch of {len(jobs)} failed: {e}")
+            return 0
+        self._store.complete(token, jobs)
+
+        lag = time.time() - min(job["enqueued_at"] for job in jobs)
+        with self._lock:
+            m = self._metrics
+            m["processed"] += len(jobs)
+            m["batches"] += 1
+            m["last_batch_size"] = len(jobs)
+            m["last_batch_seconds"] = round(time.perf_counter() - started, 3)
+            m["last_lag_seconds"] = round(lag, 3)
+            m["max_lag_seconds"] = round(max(lag, m["max_lag_seconds"] or 0), 3)
+        return len(jobs)
+
+    def stats(self) -> Dict:
+        """Queue depth and lag (age of the oldest pending job) plus this process's worker counters."""
+        pending, failed, oldest = self._store.counts(current_app.config.get('EMBEDDING_JOBS_MAX_ATTEMPTS', 5))
+        with self._lock:
+            metrics = dict(self._metrics)
+        return dict(metrics, depth=pending, failed_jobs=failed,
+                    oldest_pending_seconds=round(time.time() - oldest, 3) if oldest is not None else None)
+
+
+def start_embedding_worker(app, process_jobs: Callable[[int], int]):
+    """Daemon thread that drains the active provider's queue: right after a write (plus a short window
+    so a burst of edits becomes one batch) and every EMBEDDING_JOBS_POLL_SECONDS for jobs from other processes.
+    While the queue keeps failing, the first error is printed once and the poll interval doubles up to 5 minutes."""
+    poll = app.config.get('EMBEDDING_JOBS_POLL_SECONDS', 5)
+    window = app.config.get('EMBEDDING_JOBS_BATCH_WINDOW_MS', 500) / 1000
+    batch_size = app.config.get('EMBEDDING_JOBS_BATCH_SIZE', 64)
+
+    def loop():
+        delay, failing = poll, False
+        while True:
+            if _wake.wait(timeout=delay):
+                time.sleep(window)
+            _wake.clear()
+            try:
+                with app.app_context():
+                    while process_jobs(batch_size) >= batch_size:
+                        pass
+            except Exception as e:
+                if not failing:
+                    print(f"Embedding worker: {e} (retrying with back-off)")
+                    failing = True
+                delay = min(delay * 2, _MAX_BACKOFF_SECONDS)
+                continue
+            if failing:
+                print("Embedding worker: recovered.")
+            delay, failing = poll, False
+
+    threading.Thread(target=loop, name="embedding-jobs", daemon=True).start()
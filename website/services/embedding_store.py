@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+from typing import List, Optional, Sequence
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialised within one process
+    fcntl = None
+
+_KEY_BYTES = 16
+
+
+def embedding_key(model_name: str, text: str) -> bytes:
+    return hashlib.blake2b(f"{model_name}\n{text}".encode("utf-8"), digest_size=_KEY_BYTES).digest()
+
+
+class EmbeddingStore:
+    """
+    Append-only on-disk embedding store for one model, keyed by hash(model name, text).
+    `vectors.f32` holds float32 rows and `keys.bin` the 16-byte key of each row, in the same order.
+    Vectors are memory-mapped and returned as read-only views (zero-copy), so any number of
+    processes can share the files. Readers pick up rows appended by other processes on a miss.
+    Writers append under an exclusive file lock, vectors before keys, so a key never points past
+    the data; a torn tail from a crashed writer is ignored and truncated by the next append.
+    """
+
+    def __init__(self, directory: str, model_name: str, readonly: bool = False):
+        self.model_name = model_name
+        self.readonly = readonly
+        self.path = os.path.join(directory, model_name.replace("/", "_"))
+        self._vectors_path = os.path.join(self.path, "vectors.f32")
+        self._keys_path = os.path.join(self.path, "keys.bin")
+        self._meta_path = os.path.join(self.path, "meta.json")
+        self.dim: Optional[int] = None
+        self._rows = {}
+        self._count = 0
+        self._vectors = None
+        self._lock = threading.Lock()
+        if not readonly:
+            os.makedirs(self.path, exist_ok=True)
+        self._refresh()
+
+    def __len__(self):
+        return self._count
+
+    def _read_meta(self):
+        if self.dim is None and os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            if meta.get("model") != self.model_name:
+                raise ValueError(f"{self.path} holds embeddings of {meta.get('model')}, not {self.model_name}")
+            self.dim = int(meta["dim"])
+
+    def _complete_rows(self) -> int:
+        if self.dim is None:
+            return 0
+        try:
+            keys = os.path.getsize(self._keys_path) // _KEY_BYTES
+            vectors = os.path.getsize(self._vectors_path) // (4 * self.dim)
+        except OSError:
+            return 0
+        return min(keys, vectors)
+
+    def _refresh(self):
+        """Maps rows appended since the last refresh (by this or another process)."""
+        self._read_meta()
+        count = self._complete_rows()
+        if count <= self._count:
+            return
+        with open(self._keys_path, "rb") as f:
+            f.seek(self._count * _KEY_BYTES)
+            new_keys = f.read((count - self._count) * _KEY_BYTES)
+        for i in range(count - self._count):
+            self._rows.setdefault(new_keys[i * _KEY_BYTES:(i + 1) * _KEY_BYTES], self._count + i)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(count, self.dim))
+        self._count = count
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Stored vector (read-only view) per text, None where the text has not been embedded yet."""
+        keys = [embedding_key(self.model_name, t) for t in texts]
+        with self._lock:
+            rows = [self._rows.get(k) for k in keys]
+            if any(r is None for r in rows):
+                count = self._count
+                self._refresh()
+                if self._count > count:
+                    rows = [self._rows.get(k) for k in keys]
+            vectors = self._vectors
+        return [None if r is None else vectors[r] for r in rows]
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        return self.get_many([text])[0]
+
+    def put_many(self, texts: Sequence[str], vectors) -> int:
+        """Appends the embeddings of texts not stored yet; returns how many rows were added."""
+        if self.readonly:
+            raise PermissionError(f"{self.path} was opened read-only")
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+        if not len(texts):
+            return 0
+        with self._lock, open(os.path.join(self.path, ".lock"), "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if self.dim is None:
+                self._read_meta()
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                with open(self._meta_path, "w") as f:
+                    json.dump({"model": self.model_name, "dim": self.dim}, f)
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"expected {self.dim}-d vectors, got {vectors.shape[1]}-d")
+            self._refresh()
+
+            pending = {}
+            for text, vector in zip(texts, vectors):
+                key = embedding_key(self.model_name, text)
+                if key not in self._rows and key not in pending:
+                    pending[key] = vector
+            if not pending:
+                return 0
+
+            # drop a torn tail left by a crashed writer, then append data before keys
+            for path, row_bytes in ((self._vectors_path, 4 * self.dim), (self._keys_path, _KEY_BYTES)):
+                with open(path, "ab") as f:
+                    f.truncate(self._count * row_bytes)
+            with open(self._vectors_path, "ab") as f:
+                f.write(np.ascontiguousarray(list(pending.values()), dtype=np.float32).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._keys_path, "ab") as f:
+                f.write(b"".join(pending))
+                f.flush()
+            self._refresh()
+            return len(pending)
+
+
+def open_embedding_store(directory: str, model_name: str, readonly: bool = False) -> Optional[EmbeddingStore]:
+    """EmbeddingStore in `directory`, or None when no directory is configured (store disabled)."""
+    if not directory:
+        return None
+    return EmbeddingStore(directory, model_name, readonly=readonly)
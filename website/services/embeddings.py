@@ -0,0 +1,125 @@
+from flask import current_app
+from .cache import LRUCache
+from .encoder import BatchingEncoder
+from .embedding_store import open_embedding_store
+import hashlib
+import threading
+
+# sentence-transformers model shared by the ETL, the Mongo and the SQL search paths
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+_embedding_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    global _embedding_model
+    if _embedding_model is None:
+        # two concurrent first requests must not load the model twice
+        with _model_lock:
+            if _embedding_model is None:
+                print("Loading AI Model (First Run Only)...")
+                from sentence_transformers import SentenceTransformer
+                _embedding_model = SentenceTransformer(MODEL_NAME)
+    return _embedding_model
+
+def is_model_loaded():
+    return _embedding_model is not None
+
+# query embeddings keyed on normalised query text (sized from EMBEDDING_CACHE_SIZE / EMBEDDING_CACHE_TTL)
+_query_embedding_cache = None
+
+def get_query_embedding_cache():
+    global _query_embedding_cache
+    if _query_embedding_cache is None:
+        _query_embedding_cache = LRUCache(
+            maxsize=current_app.config.get('EMBEDDING_CACHE_SIZE', 1024),
+            ttl=current_app.config.get('EMBEDDING_CACHE_TTL')
+        )
+    return _query_embedding_cache
+
+# micro-batches concurrent query encodes into one model.encode() call (ENCODER_BATCHING)
+_batching_encoder = None
+
+def get_batching_encoder():
+    global _batching_encoder
+    if _batching_encoder is None:
+        _batching_encoder = BatchingEncoder(
+            get_model,
+            window_ms=current_app.config.get('ENCODER_BATCH_WINDOW_MS', 3),
+            max_batch=current_app.config.get('ENCODER_MAX_BATCH', 32)
+        )
+    return _batching_encoder
+
+# on-disk embedding store shared with the ETL and other workers (EMBEDDING_STORE_DIR, '' disables it);
+# read-only unless EMBEDDING_STORE_APPEND_QUERIES, then new query embeddings are appended too
+_embedding_store = None
+_store_counts = {"hits": 0, "misses": 0}
+
+def get_embedding_store():
+    global _embedding_store
+    if _embedding_store is None:
+        _embedding_store = open_embedding_store(
+            current_app.config.get('EMBEDDING_STORE_DIR', ''), MODEL_NAME,
+            readonly=not current_app.config.get('EMBEDDING_STORE_APPEND_QUERIES', False)
+        ) or False
+    return _embedding_store or None
+
+def embedding_store_stats():
+    store = get_embedding_store()
+    if store is None:
+        return {"enabled": False}
+    return dict(_store_counts, enabled=True, entries=len(store), path=store.path)
+
+def module_embedding_text(module_id, module_name, description, instructor_name, credits, academic_term):
+    """The text a module is embedded from (generate_vectors.py and the re-embed job queue)."""
+    return (
+        f"{module_id} {module_name}: {description}. "
+        f"Taught by {instructor_name}. "
+        f"Credits: {credits}. "
+        f"Term: {academic_term}."
+    )
+
+def embedding_hash(text_to_embed):
+    """Stable fingerprint of what a stored embedding was computed from (model + input text)."""
+    return hashlib.sha256(f"{MODEL_NAME}\n{text_to_embed}".encode("utf-8")).hexdigest()
+
+def encode_documents(texts):
+    """Unit-length document embeddings in one batched encode, reusing the embedding store when configured."""
+    store = get_embedding_store()
+    vectors = store.get_many(texts) if store is not None else [None] * len(texts)
+    missing = [t for t, v in zip(texts, vectors) if v is None]
+    if missing:
+        encoded = get_model().encode(missing, batch_size=len(missing), normalize_embeddings=True,
+                                     convert_to_numpy=True, show_progress_bar=False)
+        if store is not None and not store.readonly:
+            store.put_many(missing, encoded)
+        fresh = iter(encoded)
+        vectors = [v if v is not None else next(fresh) for v in vectors]
+    return vectors
+
+def normalize_query(text):
+    # MiniLM's tokenizer is uncased, so lower-casing does not change the embedding
+    return " ".join(text.lower().split())
+
+def encode_query(text):
+    """Returns the query embedding, skipping the model forward pass for repeated queries."""
+    cache = get_query_embedding_cache()
+    key = normalize_query(text)
+    vector = cache.get(key)
+    if vector is None:
+        store = get_embedding_store()
+        vector = store.get(key) if store is not None else None
+        if vector is not None:
+            _store_counts["hits"] += 1
+        else:
+            if current_app.config.get('ENCODER_BATCHING', False):
+                vector = get_batching_encoder().encode(key)
+            else:
+                vector = get_model().encode(key)
+            if store is not None:
+                _store_counts["misses"] += 1
+                if not store.readonly:
+                    store.put_many([key], [vector])
+        vector.setflags(write=False)
+        cache.set(key, vector)
+    return vector
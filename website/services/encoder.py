@@ -0,0 +1,78 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+
+class BatchingEncoder:
+    """
+    Collects concurrent single-text encode requests and runs them through one batched
+    `model.encode(list)` call. A batch is flushed when `max_batch` texts are waiting or
+    `window_ms` has passed since the first one arrived, so the added latency is bounded
+    by the window plus one forward pass.
+    """
+
+    def __init__(self, get_model: Callable, window_ms: float = 3.0, max_batch: int = 32):
+        self._get_model = get_model
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.encoded = 0
+
+    def encode(self, text: str, timeout: float = 30.0):
+        """Blocks until the batch containing `text` has been encoded and returns its vector."""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future.result(timeout=timeout)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "encoded": self.encoded,
+            "avg_batch_size": (self.encoded / self.batches) if self.batches else 0.0,
+            "pending": self._queue.qsize(),
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="batching-encoder", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # identical texts in one window share a single row
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = self._get_model().encode(texts, batch_size=len(texts), show_progress_bar=False)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            rows = {text: vectors[i] for i, text in enumerate(texts)}
+            for text, future in batch:
+                future.set_result(rows[text])
+            self.batches += 1
+            self.encoded += len(texts)
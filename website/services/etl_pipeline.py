@@ -0,0 +1,176 @@
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# end-of-stream marker passed down the queues
+_DONE = object()
+
+# model and encode options of this encoder worker (set by init_encoder_worker)
+_worker_model = None
+_worker_options: Dict = {}
+
+
+def init_encoder_worker(model_name: str, batch_size: int, normalize: bool):
+    global _worker_model, _worker_options
+    from sentence_transformers import SentenceTransformer
+    _worker_model = SentenceTransformer(model_name)
+    _worker_options = {"batch_size": batch_size, "normalize_embeddings": normalize}
+
+
+def encode_chunk(texts: List[str]):
+    """(embeddings, seconds) for one chunk, run inside an encoder worker."""
+    started = time.perf_counter()
+    vectors = _worker_model.encode(texts, convert_to_numpy=True, show_progress_bar=False, **_worker_options)
+    return vectors, time.perf_counter() - started
+
+
+class _Stopped(Exception):
+    pass
+
+
+def _put(outbox: queue.Queue, item, stop: threading.Event):
+    # bounded put that gives up once another stage has failed
+    while not stop.is_set():
+        try:
+            outbox.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+    raise _Stopped()
+
+
+def _get(inbox: queue.Queue, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            return inbox.get(timeout=0.5)
+        except queue.Empty:
+            continue
+    raise _Stopped()
+
+
+def run_pipeline(read_chunks: Callable[[], Iterable[Tuple[int, object]]],
+                 build: Callable[[object], Tuple[List[str], object]],
+                 write: Callable[[object, object], None],
+                 model_name: str, workers: int = 0, batch_size: int = 64, normalize: bool = True,
+                 queue_size: int = 2, context: Callable = nullcontext, store=None) -> Dict[str, Tuple[int, float]]:
+    """
+    Streams chunks through four stages joined by bounded queues, so memory stays at a few chunks:
+      reader  - iterates read_chunks(), yielding (row count, chunk)
+      builder - build(chunk) -> (texts to encode, payload)
+      encoder - `workers` processes (in-process when workers <= 1) each holding the model
+      writer  - write(payload, embeddings), in read order, on the calling thread
+    Reader and builder threads run inside `context()` (e.g. app.app_context). An error in any stage
+    stops the others and is re-raised here. With an EmbeddingStore as `store`, texts it already holds
+    skip the encoder and new embeddings are appended to it. Returns {stage: (rows, busy seconds)}.
+    """
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    stats = {stage: [0, 0.0] for stage in ("read", "build", "store hits", "encode", "write")}
+    built: queue.Queue = queue.Queue(maxsize=queue_size)
+    rows_in: queue.Queue = queue.Queue(maxsize=queue_size)
+    encoding: queue.Queue = queue.Queue(maxsize=max(queue_size, workers * 2))
+
+    if workers > 1:
+        executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=init_encoder_worker, initargs=(model_name, batch_size, normalize))
+    else:
+        executor = ThreadPoolExecutor(1, initializer=init_encoder_worker, initargs=(model_name, batch_size, normalize))
+
+    def stage(body, outbox):
+        def target():
+            try:
+                with context():
+                    body()
+            except _Stopped:
+                pass
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                try:
+                    _put(outbox, _DONE, stop)
+                except _Stopped:
+                    pass
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        return thread
+
+    def reader():
+        chunks = iter(read_chunks())
+        while True:
+            started = time.perf_counter()
+            item = next(chunks, _DONE)
+            if item is _DONE:
+                return
+            count, chunk = item
+            stats["read"][0] += count
+            stats["read"][1] += time.perf_counter() - started
+            _put(rows_in, (count, chunk), stop)
+
+    def builder():
+        while True:
+            item = _get(rows_in, stop)
+            if item is _DONE:
+                return
+            count, chunk = item
+            started = time.perf_counter()
+            texts, payload = build(chunk)
+            stats["build"][0] += count
+            stats["build"][1] += time.perf_counter() - started
+            _put(built, (count, texts, payload), stop)
+
+    def dispatcher():
+        while True:
+            item = _get(built, stop)
+            if item is _DONE:
+                return
+            count, texts, payload = item
+            cached = [None] * len(texts)
+            if store is not None and texts:
+                started = time.perf_counter()
+                cached = store.get_many(texts)
+                stats["store hits"][0] += sum(v is not None for v in cached)
+                stats["store hits"][1] += time.perf_counter() - started
+            missing = [t for t, v in zip(texts, cached) if v is None]
+            if missing:
+                future = executor.submit(encode_chunk, missing)
+            else:
+                future = Future()
+                future.set_result(([], 0.0))
+            _put(encoding, (count, payload, cached, missing, future), stop)
+
+    threads = [stage(reader, rows_in), stage(builder, built), stage(dispatcher, encoding)]
+    try:
+        while True:
+            item = _get(encoding, stop)
+            if item is _DONE:
+                break
+            count, payload, cached, missing, future = item
+            encoded, seconds = future.result()
+            stats["encode"][0] += len(missing)
+            stats["encode"][1] += seconds
+            started = time.perf_counter()
+            if store is not None and missing:
+                store.put_many(missing, encoded)
+            fresh = iter(encoded)
+            vectors = [vector if vector is not None else next(fresh) for vector in cached]
+            write(payload, vectors)
+            stats["write"][0] += count
+            stats["write"][1] += time.perf_counter() - started
+    except _Stopped:
+        pass
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join(timeout=5)
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    if errors:
+        raise errors[0]
+    return {stage: (rows, seconds) for stage, (rows, seconds) in stats.items()}
@@ -0,0 +1,239 @@
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import text
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# name matches count more than description matches (same weights as the FTS5 bm25() call below)
+NAME_WEIGHT = 2
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    return _TOKEN_PATTERN.findall((value or "").lower())
+
+
+class BM25Index:
+    """
+    Pure-Python inverted index with Okapi BM25 ranking over module id, name and description.
+    Supports incremental add/remove so it can follow create/update/delete_module.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._total_len = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, str, str]]):
+        index = cls()
+        for module_id, module_name, description in rows:
+            index.add(module_id, module_name, description)
+        return index
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def add(self, module_id: str, module_name: Optional[str], description: Optional[str]):
+        terms = Counter(tokenize(module_id))
+        for token in tokenize(module_name):
+            terms[token] += NAME_WEIGHT
+        terms.update(tokenize(description))
+
+        with self._lock:
+            self._remove_locked(module_id)
+            self._doc_terms[module_id] = terms
+            length = sum(terms.values())
+            self._doc_len[module_id] = length
+            self._total_len += length
+            for term, tf in terms.items():
+                self._postings[term][module_id] = tf
+
+    def remove(self, module_id: str):
+        with self._lock:
+            self._remove_locked(module_id)
+
+    def _remove_locked(self, module_id: str):
+        terms = self._doc_terms.pop(module_id, None)
+        if terms is None:
+            return
+        self._total_len -= self._doc_len.pop(module_id)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(module_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        """Returns [(module_id, bm25_score)] best first."""
+        n = len(self._doc_len)
+        if n == 0:
+            return []
+        avgdl = self._total_len / n
+        scores: Dict[str, float] = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for module_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[module_id] / avgdl)
+                scores[module_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
+
+
+class PythonFulltextEngine:
+    """
+    Fallback engine: BM25Index built lazily from `load_rows()`, kept in sync by the write hooks and
+    rebuilt after `max_age` seconds (writes made by other processes are only seen on a rebuild).
+    """
+
+    name = "python"
+
+    def __init__(self, load_rows, max_age: Optional[float] = None):
+        self._load_rows = load_rows
+        self._max_age = max_age
+        self._index: Optional[BM25Index] = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def _expired(self) -> bool:
+        return bool(self._max_age) and (time.time() - self._built_at) > self._max_age
+
+    def _get(self) -> BM25Index:
+        if self._index is None or self._expired():
+            with self._lock:
+                if self._index is None or self._expired():
+                    self._index = BM25Index.from_rows(self._load_rows())
+                    self._built_at = time.time()
+        return self._index
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        return self._get().search(query, limit)
+
+    def index_module(self, module_id, module_name, description):
+        if self._index is not None:
+            self._index.add(module_id, module_name, description)
+
+    def remove_module(self, module_id):
+        if self._index is not None:
+            self._index.remove(module_id)
+
+
+class MySQLFulltextEngine:
+    """
+    InnoDB FULLTEXT index on (module_id, module_name, description). InnoDB ranks natural-language
+    MATCH ... AGAINST with a BM25-style TF-IDF and maintains the index itself, so the hooks are no-ops.
+    """
+
+    name = "mysql"
+
+    def __init__(self, session):
+        self._session = session
+
+    def ensure_index(self):
+        # the index is part of the schema (DATABASE-SQL-SCRIPT.sql); never ALTER a live table from a request
+        exists = self._session.execute(text("""
+            SELECT 1 FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'modules' AND INDEX_NAME = 'ft_modules_text'
+        """)).first()
+        if not exists:
+            raise RuntimeError("FULLTEXT index ft_modules_text is missing on modules (see DATABASE-SQL-SCRIPT.sql)")
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        rows = self._session.execute(text("""
+            SELECT module_id, MATCH(module_id, module_name, description) AGAINST (:q IN NATURAL LANGUAGE MODE) AS score
+            FROM modules
+            WHERE MATCH(module_id, module_name, description) AGAINST (:q IN NATURAL LANGUAGE MODE)
+            ORDER BY score DESC
+            LIMIT :limit
+        """), {"q": query, "limit": limit}).all()
+        return [(r.module_id, float(r.score)) for r in rows]
+
+    def index_module(self, module_id, module_name, description):
+        pass
+
+    def remove_module(self, module_id):
+        pass
+
+
+class SQLiteFTS5Engine:
+    """FTS5 virtual table mirroring the modules text columns, ranked with bm25()."""
+
+    name = "sqlite"
+
+    def __init__(self, session):
+        self._session = session
+
+    def ensure_index(self):
+        self._session.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS modules_fts "
+            "USING fts5(module_id, module_name, description, tokenize='porter unicode61')"
+        ))
+        empty = self._session.execute(text("SELECT 1 FROM modules_fts LIMIT 1")).first() is None
+        if empty:
+            self._session.execute(text(
+                "INSERT INTO modules_fts (module_id, module_name, description) "
+                "SELECT module_id, module_name, COALESCE(description, '') FROM modules"
+            ))
+        self._session.commit()
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # OR the quoted tokens so FTS5 query syntax in user input is never interpreted
+        match = " OR ".join(f'"{t}"' for t in tokens)
+        rows = self._session.execute(text("""
+            SELECT module_id, bm25(modules_fts, 1.0, 2.0, 1.0) AS rank
+            FROM modules_fts
+            WHERE modules_fts MATCH :match
+            ORDER BY rank
+            LIMIT :limit
+        """), {"match": match, "limit": limit}).all()
+        # bm25() is lower-is-better; flip it so every engine returns higher-is-better scores
+        return [(r.module_id, -float(r.rank)) for r in rows]
+
+    def index_module(self, module_id, module_name, description):
+        self._session.execute(text("DELETE FROM modules_fts WHERE module_id = :id"), {"id": module_id})
+        self._session.execute(text(
+            "INSERT INTO modules_fts (module_id, module_name, description) VALUES (:id, :name, :desc)"
+        ), {"id": module_id, "name": module_name or "", "desc": description or ""})
+        self._session.commit()
+
+    def remove_module(self, module_id):
+        self._session.execute(text("DELETE FROM modules_fts WHERE module_id = :id"), {"id": module_id})
+        self._session.commit()
+
+
+def create_engine_for(session, dialect: str, backend: str = "auto", load_rows=None, max_age: Optional[float] = None):
+    """
+    Picks the full-text engine: MySQL FULLTEXT, SQLite FTS5, or the pure-Python BM25 index
+    (rebuilt after `max_age` seconds). Falls back to Python whenever the native index cannot be created.
+    """
+    if backend in ("auto", "mysql") and dialect == "mysql":
+        engine = MySQLFulltextEngine(session)
+    elif backend in ("auto", "sqlite") and dialect == "sqlite":
+        engine = SQLiteFTS5Engine(session)
+    else:
+        return PythonFulltextEngine(load_rows, max_age=max_age)
+
+    try:
+        engine.ensure_index()
+        return engine
+    except Exception as e:
+        session.rollback()
+        print(f"Full-text index unavailable on {dialect} ({e}), using the Python BM25 index.")
+        return PythonFulltextEngine(load_rows, max_age=max_age)
@@ -0,0 +1,157 @@
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+# titles people type in front of instructor names ("Prof Jonh", "Dr. Lee")
+HONORIFICS = {"prof", "professor", "dr", "mr", "mrs", "ms", "mdm", "assoc", "asst"}
+
+# how many trigram-ranked candidates get the (comparatively expensive) edit-distance check
+_MAX_VERIFIED = 50
+
+
+def _normalise(value: Optional[str]) -> str:
+    return " ".join((value or "").lower().replace(".", " ").split())
+
+
+def strip_honorifics(query: str) -> str:
+    return " ".join(t for t in _normalise(query).split(" ") if t not in HONORIFICS)
+
+
+def trigrams(value: str) -> Set[str]:
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """
+    Optimal-string-alignment distance (Levenshtein plus adjacent transpositions, so "jonh" -> "john" is 1).
+    Stops early and returns max_distance + 1 once every cell of a row exceeds `max_distance`.
+    """
+    if a == b:
+        return 0
+    if max_distance is not None and abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def similarity(a: str, b: str, min_similarity: float = 0.0) -> float:
+    """1 - distance / longer length, with the distance bounded by what `min_similarity` still allows."""
+    longest = max(len(a), len(b))
+    if longest == 0:
+        return 1.0
+    budget = int(longest * (1 - min_similarity))
+    distance = edit_distance(a, b, budget)
+    return 0.0 if distance > budget else 1 - distance / longest
+
+
+class FuzzyIndex:
+    """
+    Typo-tolerant lookup of module codes, module names and instructor names.
+    A character-trigram inverted index narrows the catalog to the entries sharing the most
+    trigrams with the query; only those are verified with edit distance.
+    Same upsert/remove interface as AutocompleteIndex, so both follow the same write hooks.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._entries: Dict[int, Dict] = {}
+        self._labels: Dict[int, List[str]] = {}
+        self._grams_of: Dict[int, Set[str]] = {}
+        self._entry_of: Dict[Tuple[str, object], int] = {}
+        self._next_entry = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def upsert(self, kind: str, ref_id, text: str, labels):
+        labels = [label for label in (_normalise(l) for l in labels) if label]
+        with self._lock:
+            self._remove_locked(kind, ref_id)
+            if not labels:
+                return
+            entry = self._next_entry
+            self._next_entry += 1
+            grams = set().union(*(trigrams(label) for label in labels))
+            # word-level grams too, so a single misspelt word still finds the entry
+            for label in labels:
+                for token in label.split(" "):
+                    grams |= trigrams(token)
+            for gram in grams:
+                self._postings[gram].add(entry)
+            self._entries[entry] = {"type": kind, "id": ref_id, "text": text}
+            self._labels[entry] = labels
+            self._grams_of[entry] = grams
+            self._entry_of[(kind, ref_id)] = entry
+
+    def bulk_load(self, items):
+        """Indexes many (kind, ref_id, text, labels) suggestions; postings are sets, so this is just upserts."""
+        for kind, ref_id, text, labels in items:
+            self.upsert(kind, ref_id, text, labels)
+
+    def remove(self, kind: str, ref_id):
+        with self._lock:
+            self._remove_locked(kind, ref_id)
+
+    def contains(self, kind: str, ref_id) -> bool:
+        return (kind, ref_id) in self._entry_of
+
+    def _remove_locked(self, kind, ref_id):
+        entry = self._entry_of.pop((kind, ref_id), None)
+        if entry is None:
+            return
+        for gram in self._grams_of.pop(entry):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(entry)
+                if not postings:
+                    del self._postings[gram]
+        del self._entries[entry]
+        del self._labels[entry]
+
+    def search(self, query: str, kind: Optional[str] = None, limit: int = 10,
+               min_similarity: float = 0.8, by_token: bool = False) -> List[Tuple[Dict, float]]:
+        """
+        [(entry, similarity)] best first. By default the whole query is compared with each label;
+        `by_token` instead averages, over the query's words, the best match among the label's words.
+        """
+        query = _normalise(query)
+        if not query:
+            return []
+        query_tokens = query.split(" ")
+        grams = trigrams(query)
+        for token in query_tokens:
+            grams |= trigrams(token)
+
+        with self._lock:
+            overlap: Dict[int, int] = defaultdict(int)
+            for gram in grams:
+                for entry in self._postings.get(gram, ()):
+                    overlap[entry] += 1
+            candidates = [e for e in overlap if kind is None or self._entries[e]["type"] == kind]
+            candidates.sort(key=lambda e: overlap[e], reverse=True)
+            candidates = [(e, self._labels[e], dict(self._entries[e])) for e in candidates[:_MAX_VERIFIED]]
+
+        scored = []
+        for entry, labels, data in candidates:
+            if by_token:
+                words = [w for label in labels for w in label.split(" ")]
+                score = sum(max(similarity(t, w) for w in words) for t in query_tokens) / len(query_tokens)
+            else:
+                score = max(similarity(query, label, min_similarity) for label in labels)
+            if score >= min_similarity:
+                scored.append((data, score))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
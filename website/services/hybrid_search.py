@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence
+from flask import current_app
+from .module_code_index import looks_like_module_code
+
+# keyword and vector retrieval run side by side on this pool
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hybrid-search")
+
+# recent per-stage latencies (ms) for /api/search/stats
+_stage_timings: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
+_timings_lock = threading.Lock()
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Dict]], k: int = 60) -> List[Dict]:
+    """RRF: score(d) = sum over rankings of 1 / (k + rank(d)), rank starting at 1."""
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            fused[hit['module_id']] += 1.0 / (k + rank)
+    return _sorted(fused)
+
+
+def weighted_fusion(keyword: List[Dict], vector: List[Dict], vector_weight: float = 0.5) -> List[Dict]:
+    """Min-max normalises each retriever's scores, then blends them with `vector_weight`."""
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking, weight in ((keyword, 1.0 - vector_weight), (vector, vector_weight)):
+        if not ranking:
+            continue
+        scores = [hit['score'] for hit in ranking]
+        low, high = min(scores), max(scores)
+        for hit in ranking:
+            norm = (hit['score'] - low) / (high - low) if high > low else 1.0
+            fused[hit['module_id']] += weight * norm
+    return _sorted(fused)
+
+
+def _sorted(fused: Dict[str, float]) -> List[Dict]:
+    return [{"module_id": module_id, "score": score}
+            for module_id, score in sorted(fused.items(), key=lambda item: item[1], reverse=True)]
+
+
+def _timed(app, fn, *args, **kwargs):
+    # worker threads need their own app context (and therefore their own SQL session)
+    with app.app_context():
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        return result, (time.perf_counter() - started) * 1000
+
+
+def hybrid_search(service, original_query, term=None, level=None, instructor=None, student_major=None,
+                  fusion='rrf', limit=10):
+    """
+    Runs `service.keyword_search_ids` and `service.vector_search_ids` concurrently, fuses the two
+    rankings and hydrates the top `limit`. Returns (results, timings_ms).
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    # module codes skip both retrievers, as in the semantic path
+    clean_query = original_query.replace(" ", "")
+    if looks_like_module_code(clean_query):
+        module_ids = service.get_code_index().lookup(clean_query)
+        if module_ids:
+            results = service.get_module_details_by_ids_list(module_ids)
+            for res in results:
+                res['score'] = 1.0
+                res['module_code'] = res['module_id']
+            timings['total'] = (time.perf_counter() - started) * 1000
+            record_timings(timings)
+            return results, timings
+
+    fused = hybrid_rank(service, original_query, term, level, instructor, student_major, fusion, limit, timings)
+
+    stage = time.perf_counter()
+    results = service.get_module_details_by_ids_list([hit['module_id'] for hit in fused]) if fused else []
+    score_map = {hit['module_id']: hit['score'] for hit in fused}
+    for res in results:
+        res['score'] = score_map.get(res['module_id'], 0)
+        res['module_code'] = res['module_id']
+    timings['hydrate'] = (time.perf_counter() - stage) * 1000
+
+    timings['total'] = (time.perf_counter() - started) * 1000
+    record_timings(timings)
+    return results, timings
+
+
+def hybrid_rank(service, original_query, term=None, level=None, instructor=None, student_major=None,
+                fusion='rrf', limit=10, timings=None):
+    """Fused [{module_id, score}] (top `limit`) without hydration; stage timings go into `timings`."""
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+    app = current_app._get_current_object()
+    depth = max(limit, current_app.config.get('HYBRID_CANDIDATES', 50))
+    filters = dict(term=term, level=level, instructor=instructor, student_major=student_major)
+
+    keyword_future = _executor.submit(_timed, app, service.keyword_search_ids, original_query, limit=depth, **filters)
+    vector_future = _executor.submit(_timed, app, service.vector_search_ids, original_query, limit=depth, **filters)
+    keyword, timings['keyword'] = keyword_future.result()
+    vector, timings['vector'] = vector_future.result()
+    timings['retrieval'] = (time.perf_counter() - started) * 1000
+
+    stage = time.perf_counter()
+    if fusion == 'weighted':
+        fused = weighted_fusion(keyword, vector, current_app.config.get('HYBRID_VECTOR_WEIGHT', 0.5))
+    else:
+        fused = reciprocal_rank_fusion([keyword, vector], k=current_app.config.get('HYBRID_RRF_K', 60))
+    timings['fusion'] = (time.perf_counter() - stage) * 1000
+    return fused[:limit]
+
+
+def record_timings(timings: Dict[str, float]):
+    with _timings_lock:
+        for stage, ms in timings.items():
+            _stage_timings[stage].append(ms)
+
+
+def timing_stats() -> Dict[str, Dict[str, float]]:
+    """p50 / p95 / max per stage over the last 1000 hybrid searches."""
+    stats = {}
+    with _timings_lock:
+        for stage, values in _stage_timings.items():
+            ordered = sorted(values)
+            if not ordered:
+                continue
+            stats[stage] = {
+                "count": len(ordered),
+                "p50_ms": round(ordered[len(ordered) // 2], 3),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+                "max_ms": round(ordered[-1], 3),
+            }
+    return stats
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    """Formats timings for the Server-Timing response header (visible in browser devtools)."""
+    return ", ".join(f"{stage};dur={ms:.2f}" for stage, ms in timings.items())
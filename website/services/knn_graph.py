@@ -0,0 +1,158 @@
+import threading
+import numpy as np
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# rows scored per matrix multiply when building, so memory is block x n instead of n x n
+_BLOCK_ROWS = 512
+
+
+class KNNGraph:
+    """
+    Precomputed k-nearest-neighbour graph over module embeddings (cosine similarity).
+    Built with blocked matrix multiplication; afterwards single modules can be upserted or
+    removed, and only the neighbour lists they actually affect are recomputed.
+    """
+
+    def __init__(self, ids: Sequence[str], matrix: np.ndarray, k: int = 10):
+        self.k = k
+        self.ids: List[str] = list(ids)
+        self._rows: Dict[str, int] = {item_id: row for row, item_id in enumerate(self.ids)}
+        self.matrix = _normalise(np.asarray(matrix, dtype=np.float32).reshape(len(self.ids), -1))
+        self._neighbours: Dict[str, List[Tuple[str, float]]] = {}
+        self._lock = threading.Lock()
+        self._build()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def neighbours(self, item_id: str, limit: Optional[int] = None) -> Optional[List[Tuple[str, float]]]:
+        """[(id, cosine)] best first, or None for an unknown id."""
+        found = self._neighbours.get(item_id)
+        return None if found is None else found[:limit or self.k]
+
+    def _build(self):
+        n = len(self.ids)
+        for start in range(0, n, _BLOCK_ROWS):
+            scores = self.matrix[start:start + _BLOCK_ROWS] @ self.matrix.T
+            for offset, row in enumerate(scores):
+                self._neighbours[self.ids[start + offset]] = self._top(row, start + offset)
+
+    def _top(self, scores: np.ndarray, own_row: int) -> List[Tuple[str, float]]:
+        scores = scores.copy()
+        scores[own_row] = -np.inf
+        k = min(self.k, scores.size - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k] if k < scores.size else np.arange(scores.size)
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.ids[i], float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def _recompute(self, item_id: str):
+        row = self._rows[item_id]
+        self._neighbours[item_id] = self._top(self.matrix @ self.matrix[row], row)
+
+    def upsert(self, item_id: str, vector: np.ndarray):
+        """Adds a module or replaces its embedding, then repairs the neighbour lists it enters or leaves."""
+        vector = _normalise(np.asarray(vector, dtype=np.float32).reshape(1, -1))[0]
+        with self._lock:
+            if item_id in self._rows:
+                self.matrix[self._rows[item_id]] = vector
+            else:
+                self._rows[item_id] = len(self.ids)
+                self.ids.append(item_id)
+                self.matrix = np.vstack([self.matrix, vector[None, :]]) if self.matrix.size else vector[None, :].copy()
+
+            scores = self.matrix @ vector
+            own_row = self._rows[item_id]
+            self._neighbours[item_id] = self._top(scores, own_row)
+
+            for other, neighbours in self._neighbours.items():
+                if other == item_id:
+                    continue
+                score = float(scores[self._rows[other]])
+                listed = next((i for i, (n, _) in enumerate(neighbours) if n == item_id), None)
+                worst = neighbours[-1][1] if len(neighbours) >= self.k else -np.inf
+                if listed is not None:
+                    if score >= worst or len(neighbours) < self.k:
+                        neighbours[listed] = (item_id, score)
+                        neighbours.sort(key=lambda pair: pair[1], reverse=True)
+                    else:
+                        # it fell out of the list; something else may now belong there
+                        self._recompute(other)
+                elif score > worst:
+                    neighbours.append((item_id, score))
+                    neighbours.sort(key=lambda pair: pair[1], reverse=True)
+                    del neighbours[self.k:]
+
+    def remove(self, item_id: str):
+        with self._lock:
+            row = self._rows.pop(item_id, None)
+            if row is None:
+                return
+            del self._neighbours[item_id]
+            self.ids.pop(row)
+            self.matrix = np.delete(self.matrix, row, axis=0)
+            self._rows = {other: r for r, other in enumerate(self.ids)}
+            for other, neighbours in list(self._neighbours.items()):
+                if any(n == item_id for n, _ in neighbours):
+                    self._recompute(other)
+
+    def changed_ids(self, ids: Sequence[str], matrix: np.ndarray) -> Tuple[List[str], List[int]]:
+        """(ids no longer present, rows of `matrix` that are new or whose vector changed)."""
+        matrix = _normalise(np.asarray(matrix, dtype=np.float32))
+        current = set(ids)
+        gone = [item_id for item_id in self.ids if item_id not in current]
+        changed = []
+        for row, item_id in enumerate(ids):
+            own = self._rows.get(item_id)
+            if own is None or np.abs(self.matrix[own] - matrix[row]).max() > 1e-5:
+                changed.append(row)
+        return gone, changed
+
+
+class SyncedKNNGraph:
+    """
+    Keeps a KNNGraph in step with a provider's ModuleVectorIndex. The first call builds it;
+    after each module index rebuild only the modules whose embedding changed are re-linked
+    (a full rebuild when more than a quarter of the catalog changed).
+    """
+
+    def __init__(self, get_module_index: Callable, k: int = 10):
+        self._get_module_index = get_module_index
+        self.k = k
+        self._graph: Optional[KNNGraph] = None
+        self._synced_with = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[KNNGraph]:
+        module_index = self._get_module_index()
+        if self._graph is not None and self._synced_with is module_index:
+            return self._graph
+        with self._lock:
+            if self._graph is None or self._synced_with is not module_index:
+                self._refresh(module_index)
+            return self._graph
+
+    def _refresh(self, module_index):
+        ids, matrix = module_index.module_ids, module_index.matrix
+        if self._graph is not None and len(ids):
+            gone, changed = self._graph.changed_ids(ids, matrix)
+            if len(gone) + len(changed) <= max(1, len(ids) // 4):
+                for item_id in gone:
+                    self._graph.remove(item_id)
+                for row in changed:
+                    self._graph.upsert(ids[row], matrix[row])
+                self._synced_with = module_index
+                return
+        self._graph = KNNGraph(ids, matrix, k=self.k) if len(ids) else None
+        self._synced_with = module_index
+        if self._graph is not None:
+            print(f"Similar-modules graph built: {len(self._graph)} modules, k={self.k}.")
+
+
+def _normalise(matrix: np.ndarray) -> np.ndarray:
+    if matrix.size == 0:
+        return matrix
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
@@ -0,0 +1,66 @@
+import re
+import time
+from bisect import bisect_left
+from typing import Iterable, List
+
+# INF2002, inf2002, 2002, 2002A (as before) plus code prefixes such as INF2 / CSC30
+_MODULE_CODE_PATTERN = re.compile(r'^(?:[a-zA-Z]{1,4})?\d{3,4}[a-zA-Z]?$|^[a-zA-Z]{2,4}\d{1,4}$')
+
+
+def looks_like_module_code(query: str) -> bool:
+    return bool(_MODULE_CODE_PATTERN.match(query.replace(" ", "")))
+
+
+class ModuleCodeIndex:
+    """
+    Case-insensitive module-code lookup without a collection scan.
+    Exact hits come from a dict; prefix and suffix hits from binary searches over a
+    sorted list of lower-cased codes and a sorted list of reversed lower-cased codes.
+    """
+
+    def __init__(self, module_ids: Iterable[str]):
+        ids = [m for m in module_ids if m]
+        self._exact = {m.lower(): m for m in ids}
+        self._forward = sorted((m.lower(), m) for m in ids)
+        self._reversed = sorted((m.lower()[::-1], m) for m in ids)
+        self.built_at = time.time()
+
+    def __len__(self):
+        return len(self._exact)
+
+    def exact(self, code: str):
+        return self._exact.get(code.lower())
+
+    def prefix(self, prefix: str) -> List[str]:
+        return _range(self._forward, prefix.lower())
+
+    def suffix(self, suffix: str) -> List[str]:
+        return _range(self._reversed, suffix.lower()[::-1])
+
+    def lookup(self, query: str) -> List[str]:
+        """
+        Codes ending with `query` (same result as the old `.*{q}$` regex, exact hit first),
+        falling back to codes starting with it.
+        """
+        query = query.replace(" ", "")
+        if not query:
+            return []
+        matches = self.suffix(query)
+        if not matches:
+            return self.prefix(query)
+        exact = self.exact(query)
+        if exact:
+            matches.remove(exact)
+            matches.insert(0, exact)
+        return matches
+
+
+def _range(keys, prefix: str) -> List[str]:
+    # all entries whose key starts with `prefix` form one contiguous run in sorted order
+    start = bisect_left(keys, (prefix,))
+    results = []
+    for key, value in keys[start:]:
+        if not key.startswith(prefix):
+            break
+        results.append(value)
+    return results
@@ -0,0 +1,54 @@
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+# students scored per matrix multiply; bounds the (block x modules) score matrix
+_STUDENT_BLOCK = 1024
+
+
+def compute_recommendations(student_ids: Sequence, student_matrix: np.ndarray, student_majors: Sequence[Optional[str]],
+                            module_ids: Sequence[str], module_matrix: np.ndarray, module_majors: Sequence[Iterable[str]],
+                            taken: Dict[object, Set[str]], top_n: int = 20,
+                            major_boost: float = 0.1) -> Dict[object, List[Dict]]:
+    """
+    Top-`top_n` modules per student by cosine similarity between the student's and the module's
+    embedding, plus `major_boost` when the module targets the student's major (or "All").
+    Modules in `taken[student_id]` (enrolled or completed) are never recommended.
+    Returns {student_id: [{'module_id', 'score'}]} best first.
+    """
+    if len(student_ids) == 0 or len(module_ids) == 0:
+        return {}
+
+    modules = _normalise(np.asarray(module_matrix, dtype=np.float32))
+    students = _normalise(np.asarray(student_matrix, dtype=np.float32))
+    column = {module_id: i for i, module_id in enumerate(module_ids)}
+
+    # one boost row per distinct major, shared by every student in it
+    open_to_all = np.array([("All" in majors) for majors in module_majors], dtype=np.float32)
+    boost_rows: Dict[Optional[str], np.ndarray] = {}
+    for major in set(student_majors):
+        targeted = np.array([(major in majors) for majors in module_majors], dtype=np.float32) if major else 0
+        boost_rows[major] = major_boost * np.maximum(targeted, open_to_all)
+
+    k = min(top_n, len(module_ids))
+    results: Dict[object, List[Dict]] = {}
+    for start in range(0, len(student_ids), _STUDENT_BLOCK):
+        block = slice(start, start + _STUDENT_BLOCK)
+        scores = students[block] @ modules.T
+        for offset, student_id in enumerate(student_ids[block]):
+            row = scores[offset] + boost_rows[student_majors[start + offset]]
+            excluded = [column[m] for m in taken.get(student_id, ()) if m in column]
+            row[excluded] = -np.inf
+
+            top = np.argpartition(-row, k - 1)[:k] if k < row.size else np.arange(row.size)
+            top = top[np.argsort(-row[top], kind='stable')]
+            results[student_id] = [
+                {"module_id": module_ids[i], "score": round(float(row[i]), 4)}
+                for i in top if np.isfinite(row[i])
+            ]
+    return results
+
+
+def _normalise(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
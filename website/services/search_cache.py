@@ -0,0 +1,37 @@
+import threading
+from flask import current_app
+from .cache import LRUCache
+from .embeddings import normalize_query
+
+# Bumped by every write that can change a search result: module create/update/delete, and
+# enroll/drop (slots_left is part of each result). Cache keys embed the version, so a bump
+# makes every older entry unreachable; LRU eviction then reclaims them.
+# The counter is per process - multi-worker deployments rely on SEARCH_CACHE_TTL across workers.
+_catalog_version = 0
+_version_lock = threading.Lock()
+
+def bump_catalog_version():
+    global _catalog_version
+    with _version_lock:
+        _catalog_version += 1
+
+def catalog_version():
+    return _catalog_version
+
+# search results keyed on (catalog version, provider, mode, normalised parameters)
+_search_cache = None
+
+def get_search_cache():
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = LRUCache(
+            maxsize=current_app.config.get('SEARCH_CACHE_SIZE', 2048),
+            ttl=current_app.config.get('SEARCH_CACHE_TTL')
+        )
+    return _search_cache
+
+def search_cache_key(provider, mode, original_query, term=None, level=None, instructor=None, student_major=None):
+    return (
+        _catalog_version, provider, mode, normalize_query(original_query),
+        term or None, str(level) if level else None, instructor or None, student_major or None
+    )
@@ -0,0 +1,64 @@
+import base64
+import binascii
+import secrets
+from flask import current_app
+from .cache import LRUCache
+
+# ranked [{module_id, score}] lists from first-page searches, keyed by an opaque token.
+# Later pages slice the stored list and only hydrate their own ids, so paging never
+# re-runs the encoder or the vector search. The store is per process: with several
+# workers behind a load balancer, a cursor only resolves on the worker that issued it
+# (elsewhere it reads as expired), so paged clients need sticky sessions.
+_ranked_lists = None
+
+def get_ranked_list_store():
+    global _ranked_lists
+    if _ranked_lists is None:
+        _ranked_lists = LRUCache(
+            maxsize=current_app.config.get('SEARCH_CURSOR_CACHE_SIZE', 1024),
+            ttl=current_app.config.get('SEARCH_CURSOR_TTL', 600)
+        )
+    return _ranked_lists
+
+def encode_cursor(token, offset):
+    return base64.urlsafe_b64encode(f"{token}:{offset}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """Returns (token, offset); raises ValueError for anything that is not a cursor we issued."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        token, offset = raw.rsplit(":", 1)
+        offset = int(offset)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    return token, offset
+
+def store_ranked_list(ranked, page_size):
+    token = secrets.token_urlsafe(12)
+    get_ranked_list_store().set(token, (tuple(ranked), page_size))
+    return token
+
+def load_ranked_list(token):
+    """(ranked, page_size) stored under `token` in this process; ValueError once evicted, expired or unknown here."""
+    entry = get_ranked_list_store().get(token)
+    if entry is None:
+        raise ValueError("Cursor expired, repeat the search")
+    return entry
+
+def page_of(token, ranked, offset, page_size, hydrate):
+    """Hydrates ranked[offset:offset + page_size] and builds the response body with the next cursor."""
+    page = ranked[offset:offset + page_size]
+    results = hydrate([hit['module_id'] for hit in page]) if page else []
+    score_map = {hit['module_id']: hit['score'] for hit in page}
+    for res in results:
+        res['score'] = score_map.get(res['module_id'], 0)
+        res['module_code'] = res['module_id']
+
+    next_offset = offset + page_size
+    return {
+        "results": results,
+        "total": len(ranked),
+        "next_cursor": encode_cursor(token, next_offset) if next_offset < len(ranked) else None,
+    }
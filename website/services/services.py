@@ -1,5 +1,9 @@
 from . import services_sql as sql_service
 from . import services_mongo as mongo_service
+from .hybrid_search import hybrid_search, hybrid_rank
+from .search_cache import get_search_cache, search_cache_key
+from .search_pages import decode_cursor, load_ranked_list, store_ranked_list, page_of
+from .module_code_index import looks_like_module_code
 
 # Global variable to track the active provider
 CURRENT_PROVIDER = "sql"
@@ -27,6 +31,74 @@ def get_service_provider():
 #  WRAPPER FUNCTIONS (Forward calls to active service)
 # ========================================================
 
+def _search_service():
+    # SQL databases without generated module_embeddings keep using the Mongo vector search
+    if _active_service is sql_service and not sql_service.has_module_embeddings():
+        return mongo_service
+    return _active_service
+
+# search results are cached until the next catalog write (see search_cache.py)
+def search_modules_by_query(original_query, term=None, level=None, instructor=None, student_major=None,
+                            limit=10, num_candidates=None):
+    service = _search_service()
+    cache = get_search_cache()
+    key = search_cache_key(service.__name__, f'semantic-{limit}-{num_candidates}', original_query, term, level, instructor, student_major)
+    results = cache.get(key)
+    if results is None:
+        results = service.search_modules_by_query(original_query, term, level, instructor, student_major,
+                                                  limit=limit, num_candidates=num_candidates)
+        cache.set(key, results)
+    return results
+
+def hybrid_search_modules(original_query, term=None, level=None, instructor=None, student_major=None, fusion='rrf',
+                          limit=10):
+    """Keyword + vector retrieval in parallel, fused. Returns (results, stage timings in ms)."""
+    service = _search_service()
+    cache = get_search_cache()
+    key = search_cache_key(service.__name__, f'hybrid-{fusion}-{limit}', original_query, term, level, instructor, student_major)
+    results = cache.get(key)
+    if results is not None:
+        return results, {"cache": 0.0}
+    results, timings = hybrid_search(service, original_query, term, level, instructor, student_major,
+                                     fusion=fusion, limit=limit)
+    cache.set(key, results)
+    return results, timings
+
+def _ranked_modules(service, original_query, term, level, instructor, student_major, mode, fusion, limit, num_candidates):
+    # same order as the list endpoints: module-code hits, then hybrid ranking, or (semantic mode)
+    # filtered near-miss names before the vector ranking
+    clean_query = original_query.replace(" ", "")
+    if looks_like_module_code(clean_query):
+        module_ids = service.get_code_index().lookup(clean_query)
+        if module_ids:
+            return [{"module_id": module_id, "score": 1.0} for module_id in module_ids[:limit]]
+    if mode == 'hybrid':
+        return hybrid_rank(service, original_query, term, level, instructor, student_major, fusion=fusion, limit=limit)
+    fuzzy = service.fuzzy_module_ids(original_query, term, level, instructor, student_major, limit=limit)
+    if fuzzy:
+        return fuzzy
+    return service.vector_search_ids(original_query, term, level, instructor, student_major,
+                                     limit=limit, num_candidates=num_candidates)
+
+def search_modules_page(original_query=None, term=None, level=None, instructor=None, student_major=None,
+                        mode='semantic', fusion='rrf', page_size=10, limit=100, num_candidates=None, cursor=None):
+    """
+    Cursor-paginated search. The first call ranks up to `limit` modules once and stores the list;
+    each `cursor` then serves the next `page_size` of it. Raises ValueError for a bad or expired cursor.
+    """
+    service = _search_service()
+    if cursor:
+        token, offset = decode_cursor(cursor)
+        ranked, page_size = load_ranked_list(token)
+    else:
+        ranked = _ranked_modules(service, original_query, term, level, instructor, student_major,
+                                 mode, fusion, limit, num_candidates)
+        token, offset = store_ranked_list(ranked, page_size), 0
+    return page_of(token, ranked, offset, page_size, service.get_module_details_by_ids_list)
+
+def autocomplete(prefix, limit=8):
+    return _active_service.get_autocomplete().search(prefix, limit)
+
 def get_module_data():
     return _active_service.get_module_data()
 
@@ -42,8 +114,17 @@ def update_module(module_id, data):
 def delete_module(module_id):
     return _active_service.delete_module(module_id)
 
-def get_module_details_by_ids_list(module_ids):
-    return _active_service.get_module_details_by_ids_list(module_ids)
+def get_similar_modules(module_id, limit=5):
+    return _search_service().get_similar_modules(module_id, limit)
+
+def process_embedding_jobs(limit=64):
+    return _active_service.process_embedding_jobs(limit)
+
+def get_embedding_job_stats():
+    return _active_service.get_embedding_job_stats()
+
+def get_module_details_by_ids_list(module_ids, student_id=None):
+    return _active_service.get_module_details_by_ids_list(module_ids, student_id)
 
 def get_all_users_detailed():
     return _active_service.get_all_users_detailed()
@@ -69,6 +150,9 @@ def enroll_student_in_module(student_id, module_id):
 def drop_student_enrollment_module(student_id, module_id):
     return _active_service.drop_student_enrollment_module(student_id, module_id)
 
+def get_student_recommendations(student_id, limit=10):
+    return _active_service.get_student_recommendations(student_id, limit)
+
 def get_student_enrollments(student_id):
     return _active_service.get_student_enrollments(student_id)
 
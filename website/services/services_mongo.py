@@ -1,40 +1,193 @@
 from .. import mongo
+from flask import current_app
 from datetime import datetime
 from typing import Dict, Any, List
-import re
-_embedding_model = None
-
-def get_model():
-    global _embedding_model
-    if _embedding_model is None:
-        print("Loading AI Model (First Run Only)...")
-        from sentence_transformers import SentenceTransformer
-        _embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-    return _embedding_model
+from .vector_index import ModuleVectorIndex, CachedIndex
+from .ann_index import SyncedANNIndex, ann_index_path as _ann_index_path
+from .knn_graph import SyncedKNNGraph
+from .module_code_index import ModuleCodeIndex, looks_like_module_code
+from .fulltext import PythonFulltextEngine
+from .autocomplete import NameIndexEngine
+from .fuzzy import FuzzyIndex, strip_honorifics
+from .search_cache import bump_catalog_version
+from .embedding_jobs import EmbeddingJobQueue, MongoJobStore
+from .embedding_codec import pack_embedding
+from pymongo import UpdateOne
+# the encoder lives in embeddings.py (shared with the SQL provider)
+from .embeddings import encode_query, encode_documents, module_embedding_text, embedding_hash
+
+# loads every module embedding into the in-process index (used when SEARCH_BACKEND = 'local' or 'ivf')
+def _load_module_index():
+    docs = mongo.db.modules.find(
+        {"embedding": {"$exists": True}},
+        {"_id": 0, "module_id": 1, "embedding": 1, "embedding_format": 1, "embedding_scale": 1,
+         "academic_term": 1, "module_level": 1,
+         "instructor_name": 1, "target_majors": 1}
+    )
+    index = ModuleVectorIndex.from_documents(docs)
+    print(f"Local vector index built with {len(index)} modules.")
+    return index
+
+_module_index = CachedIndex(_load_module_index, max_age=300)
+
+def get_module_index():
+    return _module_index.get()
+
+# IVF-flat ANN index over the same embeddings (SEARCH_BACKEND = 'ivf'), synced after each index rebuild
+_ann_index = None
+
+def get_ann_index():
+    global _ann_index
+    if _search_backend() != 'ivf':
+        return None
+    if _ann_index is None:
+        _ann_index = SyncedANNIndex(get_module_index, path=_ann_index_path('mongo'), nprobe=current_app.config.get('ANN_NPROBE', 16))
+    return _ann_index.get()
+
+# precomputed kNN graph over the module embeddings, re-linked incrementally after each index rebuild
+_similar_graph = None
+
+def get_similar_graph():
+    global _similar_graph
+    if _similar_graph is None:
+        _similar_graph = SyncedKNNGraph(get_module_index, k=current_app.config.get('SIMILAR_MODULES_K', 10))
+    return _similar_graph.get()
+
+def get_similar_modules(module_id, limit=5):
+    """The module's nearest neighbours by embedding, hydrated with a 'similarity' score; None if it has no embedding."""
+    graph = get_similar_graph()
+    neighbours = graph.neighbours(module_id, limit) if graph is not None else None
+    if neighbours is None:
+        return None
+    scores = dict(neighbours)
+    modules = get_module_details_by_ids_list([n for n, _ in neighbours])
+    for module in modules:
+        module['similarity'] = round(scores[module['module_id']], 4)
+    return modules
+
+# in-memory module-code lookup (exact / suffix / prefix), rebuilt after module writes
+# and every 5 minutes (to pick up writes from generate_vectors.py or other workers)
+def _load_code_index():
+    return ModuleCodeIndex(m['module_id'] for m in mongo.db.modules.find({}, {"_id": 0, "module_id": 1}))
+
+_code_index = CachedIndex(_load_code_index, max_age=300)
+
+def get_code_index():
+    return _code_index.get()
+
+# in-memory BM25 keyword index (Mongo has no lexical index outside Atlas Search),
+# rebuilt every 5 minutes to pick up writes from other processes
+def _load_keyword_rows():
+    docs = mongo.db.modules.find({}, {"_id": 0, "module_id": 1, "module_name": 1, "description": 1})
+    return [(d['module_id'], d.get('module_name'), d.get('description')) for d in docs]
+
+_keyword_engine = PythonFulltextEngine(_load_keyword_rows, max_age=300)
+
+def get_keyword_engine():
+    return _keyword_engine
+
+# typeahead over module codes / names and instructor names, updated in place by the write hooks
+# and rebuilt every 5 minutes to pick up writes from other processes
+def _load_autocomplete_rows():
+    modules = [(m['module_id'], m.get('module_name')) for m in mongo.db.modules.find({}, {"_id": 0, "module_id": 1, "module_name": 1})]
+    instructors = [(u['user_id'], u.get('first_name'), u.get('last_name')) for u in mongo.db.users.find(
+        {"role": "instructor"}, {"_id": 0, "user_id": 1, "first_name": 1, "last_name": 1}
+    )]
+    return modules, instructors
+
+_autocomplete = NameIndexEngine(_load_autocomplete_rows, max_age=300)
+
+def get_autocomplete():
+    return _autocomplete
+
+# trigram index for typo-tolerant module / instructor lookups, same rows and hooks as autocomplete
+_fuzzy = NameIndexEngine(_load_autocomplete_rows, FuzzyIndex, max_age=300)
+
+# near-miss spellings of a module name or code ("Databse Sytems"), checked before the encoder runs;
+# hits are restricted by the same term/level/instructor/major filter as vector search
+def fuzzy_module_ids(original_query, term=None, level=None, instructor=None, student_major=None, limit=10):
+    filters = _module_filter(term, level, instructor, student_major)
+    hits = _fuzzy.search(original_query, kind="module", limit=limit * 3 if filters else limit,
+                         min_similarity=current_app.config.get('FUZZY_MODULE_SIMILARITY', 0.85))
+    ranked = [{"module_id": entry["id"], "score": score} for entry, score in hits]
+    if filters and ranked:
+        allowed = {m['module_id'] for m in mongo.db.modules.find(
+            {"$and": [{"module_id": {"$in": [r['module_id'] for r in ranked]}}, filters]},
+            {"_id": 0, "module_id": 1}
+        )}
+        ranked = [r for r in ranked if r['module_id'] in allowed]
+    return ranked[:limit]
+
+# instructor ids whose name is within a few typos of `query` (titles such as "Prof" ignored)
+def _fuzzy_instructor_ids(query):
+    hits = _fuzzy.search(strip_honorifics(query), kind="instructor", limit=10, by_token=True,
+                         min_similarity=current_app.config.get('FUZZY_NAME_SIMILARITY', 0.75))
+    return [entry["id"] for entry, _ in hits]
+
+# drops every in-process structure derived from the modules collection
+def _on_modules_changed():
+    bump_catalog_version()
+    _module_index.invalidate()
+    _code_index.invalidate()
+
+# re-embeds modules after create/update; jobs persist in 'embedding_jobs' and are drained in batches
+# by the background worker (embedding_jobs.start_embedding_worker)
+def _embed_modules(module_ids):
+    docs = list(mongo.db.modules.find(
+        {"module_id": {"$in": module_ids}},
+        {"_id": 0, "module_id": 1, "module_name": 1, "description": 1, "credits": 1,
+         "academic_term": 1, "instructor_name": 1, "embedding_format": 1}
+    ))
+    embeddable = [d for d in docs if d.get("description")]
+    texts = [module_embedding_text(d["module_id"], d.get("module_name"), d["description"], d.get("instructor_name") or "TBA",
+                                   d.get("credits"), d.get("academic_term")) for d in embeddable]
+    ops = [
+        UpdateOne({"module_id": d["module_id"]},
+                  {"$set": {**pack_embedding(vector, d.get("embedding_format") or "float32"), "embedding_hash": embedding_hash(t)}})
+        for d, t, vector in zip(embeddable, texts, encode_documents(texts) if texts else [])
+    ]
+    # a module whose description was cleared must not keep the vector of its old text
+    ops += [UpdateOne({"module_id": d["module_id"]}, {"$unset": {"embedding": "", "embedding_format": "",
+                                                                "embedding_scale": "", "embedding_hash": ""}})
+            for d in docs if not d.get("description")]
+    if ops:
+        mongo.db.modules.bulk_write(ops, ordered=False)
+        bump_catalog_version()
+        _module_index.invalidate()
+
+_embedding_jobs = EmbeddingJobQueue(MongoJobStore(lambda: mongo.db.embedding_jobs), _embed_modules)
+
+def enqueue_module_embedding(module_id):
+    try:
+        _embedding_jobs.enqueue([module_id])
+    except Exception as e:
+        print(f"Could not queue re-embedding of {module_id}: {e}")
+
+def process_embedding_jobs(limit=64):
+    return _embedding_jobs.run_once(limit)
+
+def get_embedding_job_stats():
+    return _embedding_jobs.stats()
+
+def _search_backend():
+    return current_app.config.get('SEARCH_BACKEND', 'atlas')
 # =====================================================
 #  MONGODB READ OPERATIONS
 # =====================================================
-def search_modules_by_query(original_query, term=None, level=None, instructor=None, student_major=None):
+def search_modules_by_query(original_query, term=None, level=None, instructor=None, student_major=None,
+                            limit=10, num_candidates=None):
     """Semantic Search for modules with Exact Match fallback."""
     if not original_query:
         return []
 
-    # This checks the query for module codes such as INF2002, 2002, inf2002, etc.
+    # This checks the query for module codes such as INF2002, 2002, inf2002, INF2, etc.
     clean_query = original_query.replace(" ", "")
-    module_code_pattern = re.compile(r'^(?:[a-zA-Z]{1,4})?\d{3,4}[a-zA-Z]?$')
-    print(module_code_pattern.match(clean_query))
     
     # if the query is a module code, search for exact matches without semantic search
-    if module_code_pattern.match(clean_query):
-        # Look in 'modules' collection
-        exact_matches = list(mongo.db.modules.find(
-            # Your current query
-            {"module_id": {"$regex": f".*{clean_query}$", "$options": "i"}},
-            {"_id": 0, "module_id": 1}
-        ))
+    if looks_like_module_code(clean_query):
+        module_ids = get_code_index().lookup(clean_query)
         
-        if exact_matches:
-            module_ids = [res['module_id'] for res in exact_matches]
+        if module_ids:
             hydrated_results = get_module_details_by_ids_list(module_ids)
             
             for res in hydrated_results:
@@ -44,9 +197,64 @@ def search_modules_by_query(original_query, term=None, level=None, instructor=No
             
             return hydrated_results
 
-    # if the query is not a module code, perform semantic search with sentence transformers
-    query_vector = get_model().encode(original_query).tolist()
+    # near-miss spellings of a module name or code ("Databse Sytems") also skip the encoder
+    mongo_results = fuzzy_module_ids(original_query, term, level, instructor, student_major, limit=limit)
+
+    # otherwise, perform semantic search with sentence transformers
+    if not mongo_results:
+        mongo_results = vector_search_ids(original_query, term, level, instructor, student_major,
+                                          limit=limit, num_candidates=num_candidates)
+
+    if not mongo_results:
+        return []
+
+    module_ids = [res['module_id'] for res in mongo_results]
+    hydrated_results = get_module_details_by_ids_list(module_ids)
+    
+    score_map = {res['module_id']: res['score'] for res in mongo_results}
     
+    for res in hydrated_results:
+        res['score'] = score_map.get(res['module_id'], 0)
+        # Ensure module_code exists
+        res['module_code'] = res['module_id']
+
+    # sort results by score their embedding score as mongo, so highest matched search on top.
+    hydrated_results.sort(key=lambda x: x.get('score', 0), reverse=True)
+    return hydrated_results
+
+# ranked [{module_id, score}] from the configured vector backend, without hydration
+# (num_candidates is the Atlas ANN candidate pool; the in-process backends ignore it)
+def vector_search_ids(original_query, term=None, level=None, instructor=None, student_major=None, limit=10,
+                      num_candidates=None):
+    query_vector = encode_query(original_query)
+
+    if _search_backend() in ('local', 'ivf'):
+        return get_module_index().search(
+            query_vector, term=term, level=level, instructor=instructor, student_major=student_major, limit=limit,
+            ann=get_ann_index(), ann_exact_below=current_app.config.get('ANN_EXACT_BELOW', 20000)
+        )
+    return _atlas_vector_search(query_vector.tolist(), term, level, instructor, student_major,
+                                limit=limit, num_candidates=num_candidates)
+
+# ranked [{module_id, score}] from the BM25 keyword index over module id, name and description
+def keyword_search_ids(original_query, term=None, level=None, instructor=None, student_major=None, limit=10):
+    filters = _module_filter(term, level, instructor, student_major)
+    # over-fetch so filtering still leaves up to `limit` hits
+    ranked = get_keyword_engine().search(original_query, limit=limit * 3 if filters else limit)
+    if not ranked:
+        return []
+
+    if filters:
+        allowed = {m['module_id'] for m in mongo.db.modules.find(
+            {"$and": [{"module_id": {"$in": [module_id for module_id, _ in ranked]}}, filters]},
+            {"_id": 0, "module_id": 1}
+        )}
+        ranked = [(module_id, score) for module_id, score in ranked if module_id in allowed]
+
+    return [{"module_id": module_id, "score": score} for module_id, score in ranked[:limit]]
+
+# the term/level/instructor/major filter shared by $vectorSearch and find()
+def _module_filter(term=None, level=None, instructor=None, student_major=None):
     filter_list = []
     
     # filter by term
@@ -67,17 +275,25 @@ def search_modules_by_query(original_query, term=None, level=None, instructor=No
     if student_major:
         filter_list.append({"target_majors": {"$eq": student_major}})
 
+    if not filter_list:
+        return None
+    return filter_list[0] if len(filter_list) == 1 else {"$and": filter_list}
+
+# vector search through the Atlas $vectorSearch stage
+def _atlas_vector_search(query_vector, term=None, level=None, instructor=None, student_major=None, limit=10,
+                         num_candidates=None):
     vector_search_stage = {
         "index": "vector_index_search",
         "path": "embedding",
         "queryVector": query_vector,
-        "numCandidates": 100,
-        "limit": 10
+        # Atlas requires limit <= numCandidates <= 10000
+        "numCandidates": min(10000, max(limit, num_candidates or max(100, limit * 10))),
+        "limit": limit
     }
 
     # if there are filters, add them to the vector search stage
-    if filter_list:
-        vector_filter = filter_list[0] if len(filter_list) == 1 else {"$and": filter_list}
+    vector_filter = _module_filter(term, level, instructor, student_major)
+    if vector_filter:
         vector_search_stage["filter"] = vector_filter
     
     # perform vector search
@@ -88,28 +304,11 @@ def search_modules_by_query(original_query, term=None, level=None, instructor=No
     
     #  our aggregation pipeline
     try:
-        mongo_results = list(mongo.db.modules.aggregate(pipeline))
+        return list(mongo.db.modules.aggregate(pipeline))
     except Exception as e:
         print(f"Mongo Error: {e}")
         raise e
 
-    if not mongo_results:
-        return []
-
-    module_ids = [res['module_id'] for res in mongo_results]
-    hydrated_results = get_module_details_by_ids_list(module_ids)
-    
-    score_map = {res['module_id']: res['score'] for res in mongo_results}
-    
-    for res in hydrated_results:
-        res['score'] = score_map.get(res['module_id'], 0)
-        # Ensure module_code exists
-        res['module_code'] = res['module_id']
-
-    # sort results by score their embedding score as mongo, so highest matched search on top.
-    hydrated_results.sort(key=lambda x: x.get('score', 0), reverse=True)
-    return hydrated_results
-
 # get modules data with instructor info (for homepage/ general modules query )
 def get_module_data():
     pipeline = [
@@ -214,11 +413,103 @@ def get_module_details_by_id(module_id, student_id=None):
     }
 
 # get module details by list of ids
-def get_module_details_by_ids_list(module_ids: List[str]) -> List[Dict[str, Any]]:
-    # optimizable, but using loop to reuse get_module_details logic
+def get_module_details_by_ids_list(module_ids: List[str], student_id=None) -> List[Dict[str, Any]]:
+    """
+    Hydrates all requested modules in one aggregation (instructor name, slots_left and,
+    if student_id is given, the student's enrollment status), returned in the order of module_ids.
+    """
     if not module_ids: return []
-    modules = list(mongo.db.modules.find({"module_id": {"$in": module_ids}}))
-    return [get_module_details_by_id(c['module_id']) for c in modules]
+
+    pipeline = [
+        {"$match": {"module_id": {"$in": list(module_ids)}}},
+        # instructor name for modules that don't carry a denormalised instructor_name
+        {
+            "$lookup": {
+                "from": "users",
+                "localField": "instructor_id",
+                "foreignField": "user_id",
+                "as": "instructor_info"
+            }
+        },
+    ]
+
+    if student_id:
+        pipeline.append({
+            "$lookup": {
+                "from": "enrollments",
+                "let": {"mid": "$module_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$and": [
+                        {"$eq": ["$module_id", "$$mid"]},
+                        {"$eq": ["$student_id", int(student_id)]}
+                    ]}}},
+                    {"$project": {"_id": 0, "status": 1}}
+                ],
+                "as": "enrollment"
+            }
+        })
+
+    pipeline.append({
+        "$project": {
+            "_id": 0,
+            "module_id": 1,
+            "module_code": 1,
+            "module_name": 1,
+            "credits": 1,
+            "description": 1,
+            "academic_term": 1,
+            "max_capacity": 1,
+            "current_enrollment": 1,
+            "instructor_id": 1,
+            "instructor_name": 1,
+            "prerequisites": 1,
+            "instructor_info.first_name": 1,
+            "instructor_info.last_name": 1,
+            "enrollment.status": 1,
+            "slots_left": {
+                "$cond": {
+                    "if": {"$and": [
+                        {"$ne": [{"$ifNull": ["$max_capacity", None]}, None]},
+                        {"$ne": [{"$ifNull": ["$current_enrollment", None]}, None]}
+                    ]},
+                    "then": {"$subtract": ["$max_capacity", "$current_enrollment"]},
+                    "else": None
+                }
+            }
+        }
+    })
+
+    modules = {m['module_id']: m for m in mongo.db.modules.aggregate(pipeline)}
+
+    results = []
+    for module_id in module_ids:
+        module = modules.get(module_id)
+        if not module:
+            continue
+
+        # same fallback as get_module_details_by_id
+        instructor_name = module.get('instructor_name')
+        if not instructor_name and module.get('instructor_id'):
+            inst = (module.get('instructor_info') or [None])[0]
+            instructor_name = f"{inst.get('first_name')} {inst.get('last_name')}" if inst else "TBA"
+
+        enrollment = module.get('enrollment') or []
+
+        results.append({
+            "module_id": module.get('module_id'),
+            "module_code": module.get('module_code'),
+            "module_name": module.get('module_name'),
+            "credits": module.get('credits'),
+            "description": module.get('description'),
+            "academic_term": module.get('academic_term'),
+            "max_capacity": module.get('max_capacity'),
+            "current_enrollment": module.get('current_enrollment'),
+            "slots_left": module.get('slots_left'),
+            "instructor_name": instructor_name,
+            "prerequisites": module.get('prerequisites'),
+            "student_status": enrollment[0].get('status') if enrollment else None
+        })
+    return results
 
 
 # =====================================================
@@ -252,6 +543,11 @@ def create_module(data):
         "instructor_id": inst_id,
         "instructor_name": instructor_name
     })
+    _on_modules_changed()
+    _keyword_engine.index_module(data['module_id'], data['module_name'], data.get('description'))
+    _autocomplete.index_module(data['module_id'], data['module_name'])
+    _fuzzy.index_module(data['module_id'], data['module_name'])
+    enqueue_module_embedding(data['module_id'])
     return f"Module {data['module_id']} created (Mongo)."
 
 # update individual module
@@ -276,11 +572,20 @@ def update_module(module_id, data):
         {"$set": update_payload}
     )
     if res.matched_count == 0: raise ValueError("Module not found")
+    _on_modules_changed()
+    _keyword_engine.index_module(module_id, update_payload['module_name'], update_payload['description'])
+    _autocomplete.index_module(module_id, update_payload['module_name'])
+    _fuzzy.index_module(module_id, update_payload['module_name'])
+    enqueue_module_embedding(module_id)
     return f"Module {module_id} updated (Mongo)."
 
 def delete_module(module_id):
     res = mongo.db.modules.delete_one({"module_id": module_id})
     if res.deleted_count == 0: raise ValueError("Module not found")
+    _on_modules_changed()
+    _keyword_engine.remove_module(module_id)
+    _autocomplete.remove_module(module_id)
+    _fuzzy.remove_module(module_id)
     return f"Module {module_id} deleted (Mongo)."
 
 # =====================================================
@@ -321,6 +626,9 @@ def create_user(data):
     if data.get('title'): user_doc['title'] = data['title']
 
     mongo.db.users.insert_one(user_doc)
+    if data['role'] == 'instructor':
+        _autocomplete.index_instructor(new_id, data['first_name'], data['last_name'])
+        _fuzzy.index_instructor(new_id, data['first_name'], data['last_name'])
     return "User created (Mongo)."
 
 # update user
@@ -336,12 +644,16 @@ def update_user(user_id, data):
         update_fields.update({"dept": data.get('department_code'), "title": data.get('title')})
         
     mongo.db.users.update_one({"user_id": user_id}, {"$set": update_fields})
+    _autocomplete.update_user(user_id, update_fields['first_name'], update_fields['last_name'])
+    _fuzzy.update_user(user_id, update_fields['first_name'], update_fields['last_name'])
     return "User updated (Mongo)."
 
 # delete user
 def delete_user(user_id):
     res = mongo.db.users.delete_one({"user_id": user_id})
     if res.deleted_count == 0: raise ValueError("User not found")
+    _autocomplete.remove_user(user_id)
+    _fuzzy.remove_user(user_id)
     return "User deleted (Mongo)."
 
 # get user full details
@@ -388,6 +700,9 @@ def enroll_student_in_module(student_id, module_id):
         "date": datetime.now().isoformat()
     })
     mongo.db.modules.update_one({"module_id": module_id}, {"$inc": {"current_enrollment": 1}})
+    # an enrolled module is no longer a recommendation
+    mongo.db.recommendations.update_one({"student_id": student_id}, {"$pull": {"recommendations": {"module_id": module_id}}})
+    bump_catalog_version()
     return "Enrolled successfully (Mongo)."
 
 # drop student enrollment in module
@@ -395,9 +710,17 @@ def drop_student_enrollment_module(student_id, module_id):
     res = mongo.db.enrollments.delete_one({"student_id": student_id, "module_id": module_id})
     if res.deleted_count > 0:
         mongo.db.modules.update_one({"module_id": module_id}, {"$inc": {"current_enrollment": -1}})
+        bump_catalog_version()
         return "Dropped successfully (Mongo)."
     raise ValueError("Enrollment not found")
 
+# precomputed recommendations (generate_vectors.py --recommendations): one indexed lookup
+def get_student_recommendations(student_id, limit=10):
+    doc = mongo.db.recommendations.find_one({"student_id": student_id}, {"_id": 0, "recommendations": 1})
+    if not doc:
+        return None
+    return doc["recommendations"][:limit]
+
 # get student enrollments
 def get_student_enrollments(student_id):
     enrolls = list(mongo.db.enrollments.find({"student_id": student_id}))
@@ -522,20 +845,43 @@ def get_instructors_by_name(query: str):
     if not query:
         return []
 
+    instructors = _instructor_search({
+        "role": "instructor",
+        "$or": [
+            {"first_name": {"$regex": query, "$options": "i"}},
+            {"last_name": {"$regex": query, "$options": "i"}},
+            {"$expr": {"$regexMatch": {
+                "input": {"$concat": ["$first_name", " ", "$last_name"]},
+                "regex": query,
+                "options": "i"
+            }}}
+        ]
+    })
+
+    if not instructors:
+        # no substring match: try typo-tolerant matching ("Prof Jonh")
+        ids = _fuzzy_instructor_ids(query)
+        if ids:
+            instructors = _instructor_search({"role": "instructor", "user_id": {"$in": ids}})
+            instructors.sort(key=lambda i: ids.index(i.get("user_id")))
+
+    return [
+        {
+            "id": i.get("user_id"),
+            "name": f"{i.get('first_name')} {i.get('last_name')}",
+            "department_code": i.get("department_code"),
+            "title": i.get("title"),
+            "office_location": i.get("office_location"),
+            "office_hours": i.get("office_hours")
+        } 
+        for i in instructors
+    ]
+
+# instructor users matching `match`, joined with their instructor profile
+def _instructor_search(match):
     pipeline = [
         {
-            "$match": {
-                "role": "instructor",
-                "$or": [
-                    {"first_name": {"$regex": query, "$options": "i"}},
-                    {"last_name": {"$regex": query, "$options": "i"}},
-                    {"$expr": {"$regexMatch": {
-                        "input": {"$concat": ["$first_name", " ", "$last_name"]},
-                        "regex": query,
-                        "options": "i"
-                    }}}
-                ]
-            }
+            "$match": match
         },
         {
             "$lookup": {
@@ -560,20 +906,7 @@ def get_instructors_by_name(query: str):
             }
         }
     ]
-
-    instructors = list(mongo.db.users.aggregate(pipeline))
-
-    return [
-        {
-            "id": i.get("user_id"),
-            "name": f"{i.get('first_name')} {i.get('last_name')}",
-            "department_code": i.get("department_code"),
-            "title": i.get("title"),
-            "office_location": i.get("office_location"),
-            "office_hours": i.get("office_hours")
-        } 
-        for i in instructors
-    ]
+    return list(mongo.db.users.aggregate(pipeline))
 
 # get instructors by name and department
 def get_instructors_by_name_and_dept(query: str):
@@ -1,18 +1,357 @@
 from .. import db
+from flask import current_app
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 from typing import Dict, Any, List
+import numpy as np
+import re
+from .vector_index import ModuleVectorIndex, CachedIndex
+from .ann_index import SyncedANNIndex, ann_index_path
+from .knn_graph import SyncedKNNGraph
+from .module_code_index import ModuleCodeIndex, looks_like_module_code
+from .embeddings import MODEL_NAME, encode_query, encode_documents, module_embedding_text
+from .embedding_jobs import EmbeddingJobQueue, SQLJobStore
+from .search_cache import bump_catalog_version
+from . import fulltext
+from .autocomplete import NameIndexEngine
+from .fuzzy import FuzzyIndex, strip_honorifics
+
+# in-memory module-code lookup (exact / suffix / prefix), rebuilt after module writes
+# and every 5 minutes (to pick up writes from generate_vectors.py or other workers)
+def _load_code_index():
+    rows = db.session.execute(text("SELECT module_id FROM modules")).all()
+    return ModuleCodeIndex(r.module_id for r in rows)
+
+_code_index = CachedIndex(_load_code_index, max_age=300)
+
+def get_code_index():
+    return _code_index.get()
+
+# module embeddings from the module_embeddings table (filled by generate_vectors.py --sql-embeddings)
+def _load_module_index():
+    sql = text("SELECT module_id, vector FROM module_embeddings WHERE model_version = :model")
+    try:
+        rows = db.session.execute(sql, {"model": MODEL_NAME}).all()
+    except Exception as e:
+        # table not created yet on this database
+        db.session.rollback()
+        print(f"SQL vector index unavailable: {e}")
+        rows = []
+    module_ids = [r.module_id for r in rows]
+    matrix = np.vstack([np.frombuffer(r.vector, dtype='<f4') for r in rows]) if rows else np.empty((0, 0), dtype=np.float32)
+    # filters run in SQL (see _filtered_module_ids), so the index carries no filter metadata
+    empty = [None] * len(module_ids)
+    index = ModuleVectorIndex(module_ids, matrix, empty, empty, empty, [[] for _ in module_ids])
+    print(f"SQL vector index built with {len(index)} modules.")
+    return index
+
+_module_index = CachedIndex(_load_module_index, max_age=300)
+
+def get_module_index():
+    return _module_index.get()
+
+# IVF-flat ANN index over module_embeddings, enabled with SEARCH_BACKEND = 'ivf'
+_ann_index = None
+
+def get_ann_index():
+    global _ann_index
+    if current_app.config.get('SEARCH_BACKEND') != 'ivf':
+        return None
+    if _ann_index is None:
+        _ann_index = SyncedANNIndex(get_module_index, path=ann_index_path('sql'), nprobe=current_app.config.get('ANN_NPROBE', 16))
+    return _ann_index.get()
+
+# precomputed kNN graph over module_embeddings, re-linked incrementally after each index rebuild
+_similar_graph = None
+
+def get_similar_graph():
+    global _similar_graph
+    if _similar_graph is None:
+        _similar_graph = SyncedKNNGraph(get_module_index, k=current_app.config.get('SIMILAR_MODULES_K', 10))
+    return _similar_graph.get()
+
+def get_similar_modules(module_id, limit=5):
+    """The module's nearest neighbours by embedding, hydrated with a 'similarity' score; None if it has no embedding."""
+    graph = get_similar_graph()
+    neighbours = graph.neighbours(module_id, limit) if graph is not None else None
+    if neighbours is None:
+        return None
+    scores = dict(neighbours)
+    modules = get_module_details_by_ids_list([n for n, _ in neighbours])
+    for module in modules:
+        module['similarity'] = round(scores[module['module_id']], 4)
+    return modules
+
+# whether generate_vectors.py --sql-embeddings has filled module_embeddings for the current model
+def _has_stored_vectors():
+    try:
+        return db.session.execute(text("SELECT 1 FROM module_embeddings WHERE model_version = :model LIMIT 1"),
+                                  {"model": MODEL_NAME}).first() is not None
+    except Exception:
+        # table not created yet on this database
+        db.session.rollback()
+        return False
+
+# re-embeds modules after create/update into module_embeddings; jobs persist in the embedding_jobs
+# table and are drained in batches by the background worker (embedding_jobs.start_embedding_worker).
+# Only patches a table the ETL has already filled: a lone vector in an empty table would make
+# has_module_embeddings() switch semantic search from Mongo to a one-module SQL index.
+def _embed_modules(module_ids):
+    if not _has_stored_vectors():
+        return
+    rows = db.session.execute(text("""
+        SELECT m.module_id, m.module_name, m.description, m.credits, m.academic_term,
+               u.first_name, u.last_name
+        FROM modules m
+        LEFT JOIN users u ON u.user_id = m.instructor_id
+        WHERE m.module_id IN :ids
+    """).bindparams(bindparam('ids', expanding=True)), {"ids": list(module_ids)}).all()
+    embeddable = [r for r in rows if r.description]
+    texts = [
+        module_embedding_text(r.module_id, r.module_name, r.description,
+                              f"{r.first_name} {r.last_name}" if r.first_name and r.last_name else "TBA",
+                              r.credits, r.academic_term)
+        for r in embeddable
+    ]
+    vectors = encode_documents(texts) if texts else []
+    try:
+        # modules without a description lose their old vector, like in generate_vectors.py
+        db.session.execute(text(
+            "DELETE FROM module_embeddings WHERE model_version = :model AND module_id IN :ids"
+        ).bindparams(bindparam('ids', expanding=True)), {"model": MODEL_NAME, "ids": [r.module_id for r in rows]})
+        if embeddable:
+            db.session.execute(
+                text("INSERT INTO module_embeddings (module_id, model_version, vector) VALUES (:id, :model, :vec)"),
+                [{"id": r.module_id, "model": MODEL_NAME, "vec": np.asarray(v, dtype='<f4').tobytes()}
+                 for r, v in zip(embeddable, vectors)]
+            )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    if rows:
+        bump_catalog_version()
+        _module_index.invalidate()
+
+_embedding_jobs = EmbeddingJobQueue(SQLJobStore(), _embed_modules)
+
+def enqueue_module_embedding(module_id):
+    try:
+        _embedding_jobs.enqueue([module_id])
+    except Exception as e:
+        print(f"Could not queue re-embedding of {module_id}: {e}")
+
+def process_embedding_jobs(limit=64):
+    return _embedding_jobs.run_once(limit)
+
+def get_embedding_job_stats():
+    return _embedding_jobs.stats()
+
+def has_module_embeddings():
+    return len(get_module_index()) > 0
+
+# BM25 full-text engine: MySQL FULLTEXT, SQLite FTS5 or the pure-Python index (FULLTEXT_BACKEND)
+_fulltext_engine = None
+
+def _load_fulltext_rows():
+    rows = db.session.execute(text("SELECT module_id, module_name, description FROM modules")).all()
+    return [(r.module_id, r.module_name, r.description) for r in rows]
+
+def get_fulltext_engine():
+    global _fulltext_engine
+    if _fulltext_engine is None:
+        _fulltext_engine = fulltext.create_engine_for(
+            db.session, db.engine.dialect.name,
+            backend=current_app.config.get('FULLTEXT_BACKEND', 'auto'),
+            load_rows=_load_fulltext_rows, max_age=300
+        )
+        print(f"Full-text search engine: {_fulltext_engine.name}")
+    return _fulltext_engine
+
+# typeahead over module codes / names and instructor names, updated in place by the write hooks
+# and rebuilt every 5 minutes to pick up writes from other processes
+def _load_autocomplete_rows():
+    modules = db.session.execute(text("SELECT module_id, module_name FROM modules")).all()
+    instructors = db.session.execute(text("""
+        SELECT u.user_id, u.first_name, u.last_name
+        FROM instructors i JOIN users u ON i.instructor_id = u.user_id
+    """)).all()
+    return [tuple(r) for r in modules], [tuple(r) for r in instructors]
+
+_autocomplete = NameIndexEngine(_load_autocomplete_rows, max_age=300)
+
+def get_autocomplete():
+    return _autocomplete
+
+# trigram index for typo-tolerant module / instructor lookups, same rows and hooks as autocomplete
+_fuzzy = NameIndexEngine(_load_autocomplete_rows, FuzzyIndex, max_age=300)
+
+# near-miss spellings of a module name or code ("Databse Sytems"), checked before the encoder runs;
+# hits are restricted by the same term/level/instructor/major filter as vector search
+def fuzzy_module_ids(original_query, term=None, level=None, instructor=None, student_major=None, limit=10):
+    filtered = any((term, level, instructor, student_major))
+    hits = _fuzzy.search(original_query, kind="module", limit=limit * 3 if filtered else limit,
+                         min_similarity=current_app.config.get('FUZZY_MODULE_SIMILARITY', 0.85))
+    ranked = [{"module_id": entry["id"], "score": score} for entry, score in hits]
+    allowed_ids = _filtered_module_ids(term, level, instructor, student_major) if filtered and ranked else None
+    if allowed_ids is not None:
+        allowed = set(allowed_ids)
+        ranked = [r for r in ranked if r['module_id'] in allowed]
+    return ranked[:limit]
+
+# instructor ids whose name is within a few typos of `query` (titles such as "Prof" ignored)
+def _fuzzy_instructor_ids(query):
+    hits = _fuzzy.search(strip_honorifics(query), kind="instructor", limit=10, by_token=True,
+                         min_similarity=current_app.config.get('FUZZY_NAME_SIMILARITY', 0.75))
+    return [entry["id"] for entry, _ in hits]
+
+# drops every in-process structure derived from the modules table
+def _on_modules_changed():
+    bump_catalog_version()
+    _code_index.invalidate()
+    _module_index.invalidate()
 
 # =====================================================
 #  SQL READ OPERATIONS
 # =====================================================
 
+# semantic search over module_embeddings, same contract as services_mongo.search_modules_by_query
+def search_modules_by_query(original_query, term=None, level=None, instructor=None, student_major=None,
+                            limit=10, num_candidates=None):
+    """Semantic Search for modules in SQL mode, with module-code and LIKE fallbacks."""
+    if not original_query:
+        return []
+
+    # module codes (INF2002, 2002, INF2) skip the encoder entirely
+    clean_query = original_query.replace(" ", "")
+    if looks_like_module_code(clean_query):
+        module_ids = get_code_index().lookup(clean_query)
+        if module_ids:
+            results = get_module_details_by_ids_list(module_ids)
+            for res in results:
+                res['score'] = 1.0
+                res['module_code'] = res['module_id']
+            return results
+
+    fuzzy = fuzzy_module_ids(original_query, term, level, instructor, student_major, limit=limit)
+    if fuzzy:
+        return _hydrate_ranked(fuzzy)
+
+    if not has_module_embeddings():
+        # no embeddings generated for SQL yet
+        return search_modules_text(original_query, {"term": term})
+
+    ranked = vector_search_ids(original_query, term, level, instructor, student_major, limit=limit)
+    if not ranked:
+        return []
+    return _hydrate_ranked(ranked)
+
+def _hydrate_ranked(ranked):
+    results = get_module_details_by_ids_list([r['module_id'] for r in ranked])
+    score_map = {r['module_id']: r['score'] for r in ranked}
+    for res in results:
+        res['score'] = score_map.get(res['module_id'], 0)
+        res['module_code'] = res['module_id']
+    return results
+
+# ranked [{module_id, score}] from the in-process index, filters applied in SQL first (num_candidates is Atlas-only)
+def vector_search_ids(original_query, term=None, level=None, instructor=None, student_major=None, limit=10,
+                      num_candidates=None):
+    index = get_module_index()
+    mask = None
+    allowed_ids = _filtered_module_ids(term, level, instructor, student_major)
+    if allowed_ids is not None:
+        mask = index.mask_for_ids(allowed_ids)
+    return index.search(
+        encode_query(original_query), limit=limit, mask=mask,
+        ann=get_ann_index(), ann_exact_below=current_app.config.get('ANN_EXACT_BELOW', 20000)
+    )
+
+# ranked [{module_id, score}] from the BM25 full-text engine, filters applied in SQL
+def keyword_search_ids(original_query, term=None, level=None, instructor=None, student_major=None, limit=10):
+    allowed_ids = _filtered_module_ids(term, level, instructor, student_major)
+    # over-fetch so filtering still leaves up to `limit` hits
+    ranked = get_fulltext_engine().search(original_query, limit=limit * 3 if allowed_ids is not None else limit)
+    if allowed_ids is not None:
+        allowed = set(allowed_ids)
+        ranked = [(module_id, score) for module_id, score in ranked if module_id in allowed]
+    return [{"module_id": module_id, "score": score} for module_id, score in ranked[:limit]]
+
+# applies the term/level/instructor/major filters in SQL; None means "no filter"
+def _filtered_module_ids(term=None, level=None, instructor=None, student_major=None):
+    conditions = []
+    params = {}
+
+    if term:
+        conditions.append("c.academic_term = :term")
+        params['term'] = term
+    level_value = None
+    if level:
+        try:
+            level_value = int(level)
+        except ValueError: pass
+    if instructor:
+        conditions.append("CONCAT(u.first_name, ' ', u.last_name) = :instructor")
+        params['instructor'] = instructor
+    major = student_major.replace(' ', '') if student_major else None
+
+    if not conditions and level_value is None and not major:
+        return None
+
+    # level and major are checked in Python below (REGEXP_SUBSTR / FIND_IN_SET are MySQL-only)
+    sql = text(f"""
+        SELECT c.module_id, c.target_majors
+        FROM modules c
+        LEFT JOIN instructors i ON c.instructor_id = i.instructor_id
+        LEFT JOIN users u ON i.instructor_id = u.user_id
+        WHERE {" AND ".join(conditions) or "1 = 1"}
+    """)
+    module_ids = []
+    for r in db.session.execute(sql, params).all():
+        if level_value is not None and _module_level(r.module_id) != level_value:
+            continue
+        # target_majors is a comma separated list ("SE, IS")
+        if major and major not in (r.target_majors or '').replace(' ', '').split(','):
+            continue
+        module_ids.append(r.module_id)
+    return module_ids
+
+# same rule as module_level in Mongo (generate_vectors.py): first digit of the code * 1000, else 1000
+def _module_level(module_id):
+    match = re.search(r'\d', module_id or '')
+    return int(match.group()) * 1000 if match else 1000
+
 # search modules via text lookup
-def search_modules_text(query: str, filters: Dict) -> List[Dict[str, Any]]:
+def search_modules_text(query: str, filters: Dict, limit: int = 20) -> List[Dict[str, Any]]:
     """
-    SQL Fallback Search.
-    Uses standard LIKE operators. Prevents crash when in SQL Mode.
+    SQL Keyword Search.
+    Module codes (INF2002, 2002, INF2) are answered from the code index, everything else is
+    BM25-ranked over module id, name and description by the full-text engine.
+    LIKE is only used when the full-text engine finds nothing (e.g. partial words).
     """
+    if looks_like_module_code(query):
+        module_ids = get_code_index().lookup(query)
+        if module_ids:
+            results = get_module_details_by_ids_list(module_ids)
+            if filters.get('term'):
+                results = [r for r in results if r['academic_term'] == filters['term']]
+            for res in results:
+                res['module_code'] = res['module_id']
+                res['score'] = 1.0
+            return results
+
+    # over-fetch so the term filter still leaves up to `limit` hits
+    ranked = get_fulltext_engine().search(query, limit=limit * 3 if filters.get('term') else limit)
+    if ranked:
+        score_map = dict(ranked)
+        results = get_module_details_by_ids_list([module_id for module_id, _ in ranked])
+        if filters.get('term'):
+            results = [r for r in results if r['academic_term'] == filters['term']]
+        for res in results:
+            res['module_code'] = res['module_id']
+            res['score'] = score_map[res['module_id']]
+        return results[:limit]
+
     base_sql = """
         SELECT 
             c.*, 
@@ -44,7 +383,7 @@ def search_modules_text(query: str, filters: Dict) -> List[Dict[str, Any]]:
             "max_capacity": row.max_capacity,
             "current_enrollment": row.current_enrollment,
             "instructor_name": instructor_name,
-            "score": 1.0  # placeholder score for sql results
+            "score": 0.0  # unranked LIKE match
         })
     return results
 
@@ -112,6 +451,10 @@ def get_module_details_by_id(module_id, student_id=None):
         if enroll_record:
             enrollment_status = enroll_record.status
 
+    return _module_details_from_row(module, enrollment_status)
+
+# shape one modules/instructor/prerequisite row like get_module_details_by_id
+def _module_details_from_row(module, enrollment_status=None):
     instructor_name = f"{module.instructor_first} {module.instructor_last}" if module.instructor_first else "TBA"
     curr = module.current_enrollment or 0
     
@@ -130,12 +473,48 @@ def get_module_details_by_id(module_id, student_id=None):
         "student_status": enrollment_status
     }
 
+# enrollment status of one student for a batch of modules, in one query
+def get_enrollment_statuses(student_id, module_ids):
+    if not student_id or not module_ids:
+        return {}
+    sql = text("""
+        SELECT module_id, status FROM enrollments
+        WHERE student_id = :sid AND module_id IN :ids
+    """).bindparams(bindparam('ids', expanding=True))
+    rows = db.session.execute(sql, {"sid": student_id, "ids": list(module_ids)}).all()
+    return {r.module_id: r.status for r in rows}
+
 # batch fetch module details
-def get_module_details_by_ids_list(module_ids):
-    if not module_ids:
+def get_module_details_by_ids_list(module_ids, student_id=None):
+    """
+    Set-based version of get_module_details_by_id: one IN query with prerequisites
+    pulled through a single grouped join, returned in the caller's order.
+    """
+    ids = [cid for cid in module_ids if cid] if module_ids else []
+    if not ids:
         return []
-    # for simplicity, calling singular function in loop (sql optimization possible here but kept simple)
-    return [get_module_details_by_id(cid) for cid in module_ids if cid]
+
+    sql = text("""
+        SELECT 
+            c.*, 
+            u.first_name AS instructor_first, 
+            u.last_name AS instructor_last,
+            p.prereqs_list
+        FROM modules c
+        LEFT JOIN instructors i ON c.instructor_id = i.instructor_id
+        LEFT JOIN users u ON i.instructor_id = u.user_id
+        LEFT JOIN (
+            SELECT pr.module_id, GROUP_CONCAT(pr.requires_module_id SEPARATOR ', ') AS prereqs_list
+            FROM prerequisites pr
+            WHERE pr.module_id IN :ids
+            GROUP BY pr.module_id
+        ) p ON p.module_id = c.module_id
+        WHERE c.module_id IN :ids
+    """).bindparams(bindparam('ids', expanding=True))
+    rows = {r.module_id: r for r in db.session.execute(sql, {"ids": ids}).all()}
+
+    statuses = get_enrollment_statuses(student_id, ids)
+    return [_module_details_from_row(rows[cid], statuses.get(cid)) for cid in ids if cid in rows]
 
 # =====================================================
 #  SQL WRITE OPERATIONS (COURSES)
@@ -161,6 +540,11 @@ def create_module(data):
             "inst_id": data.get('instructor_id')
         })
         db.session.commit()
+        _on_modules_changed()
+        get_fulltext_engine().index_module(data['module_id'], data['module_name'], data.get('description', ''))
+        _autocomplete.index_module(data['module_id'], data['module_name'])
+        _fuzzy.index_module(data['module_id'], data['module_name'])
+        enqueue_module_embedding(data['module_id'])
         return f"Module {data['module_id']} created (SQL)."
     except IntegrityError:
         db.session.rollback()
@@ -181,12 +565,21 @@ def update_module(module_id, data):
         "cap": data.get('max_capacity')
     })
     db.session.commit()
+    _on_modules_changed()
+    get_fulltext_engine().index_module(module_id, data.get('module_name'), data.get('description'))
+    _autocomplete.index_module(module_id, data.get('module_name'))
+    _fuzzy.index_module(module_id, data.get('module_name'))
+    enqueue_module_embedding(module_id)
     return f"Module {module_id} updated (SQL)."
 
 # remove module record
 def delete_module(module_id):
     db.session.execute(text("DELETE FROM modules WHERE module_id = :id"), {"id": module_id})
     db.session.commit()
+    _on_modules_changed()
+    get_fulltext_engine().remove_module(module_id)
+    _autocomplete.remove_module(module_id)
+    _fuzzy.remove_module(module_id)
     return f"Module {module_id} deleted (SQL)."
 
 # =====================================================
@@ -231,6 +624,9 @@ def create_user(data):
                                {"id": new_id, "dept": data.get('department_code'), "title": data.get('title')})
         
         db.session.commit()
+        if data['role'] == 'instructor':
+            _autocomplete.index_instructor(new_id, data['first_name'], data['last_name'])
+            _fuzzy.index_instructor(new_id, data['first_name'], data['last_name'])
         return "User created (SQL)."
     except Exception as e:   
         db.session.rollback()
@@ -249,12 +645,16 @@ def update_user(user_id, data):
                            {"dept":data.get('department_code'), "title":data.get('title'), "id":user_id})
     
     db.session.commit()
+    _autocomplete.update_user(user_id, data['first_name'], data['last_name'])
+    _fuzzy.update_user(user_id, data['first_name'], data['last_name'])
     return "User updated (SQL)."
 
 # delete user account
 def delete_user(user_id):
     db.session.execute(text("DELETE FROM users WHERE user_id=:id"), {"id": user_id})
     db.session.commit()
+    _autocomplete.remove_user(user_id)
+    _fuzzy.remove_user(user_id)
     return "User deleted (SQL)."
 
 # fetch full user profile
@@ -296,6 +696,8 @@ def enroll_student_in_module(student_id, module_id):
         db.session.execute(text("INSERT INTO enrollments (student_id, module_id, status) VALUES (:sid, :cid, 'Enrolled')"), {"sid":student_id, "cid":module_id})
         db.session.execute(text("UPDATE modules SET current_enrollment = current_enrollment + 1 WHERE module_id=:cid"), {"cid": module_id})
         db.session.commit()
+        _drop_recommendation(student_id, module_id)
+        bump_catalog_version()
         return "Enrolled successfully (SQL)."
     except Exception as e:
         db.session.rollback()
@@ -306,8 +708,39 @@ def drop_student_enrollment_module(student_id, module_id):
     db.session.execute(text("DELETE FROM enrollments WHERE student_id=:sid AND module_id=:cid"), {"sid":student_id, "cid":module_id})
     db.session.execute(text("UPDATE modules SET current_enrollment = current_enrollment - 1 WHERE module_id=:cid"), {"cid": module_id})
     db.session.commit()
+    bump_catalog_version()
     return "Dropped successfully (SQL)."
 
+# precomputed recommendations (generate_vectors.py --recommendations), read by primary key
+def get_student_recommendations(student_id, limit=10):
+    sql = text("""
+        SELECT r.module_id, m.module_name, r.score
+        FROM student_recommendations r
+        JOIN modules m ON r.module_id = m.module_id
+        WHERE r.student_id = :sid
+        ORDER BY r.`rank`
+        LIMIT :limit
+    """)
+    try:
+        rows = db.session.execute(sql, {"sid": student_id, "limit": limit}).all()
+    except Exception as e:
+        # table not created yet on this database
+        db.session.rollback()
+        print(f"Recommendations unavailable: {e}")
+        return None
+    if not rows:
+        return None
+    return [{"module_id": r.module_id, "module_name": r.module_name, "score": r.score} for r in rows]
+
+# an enrolled module is no longer a recommendation
+def _drop_recommendation(student_id, module_id):
+    try:
+        db.session.execute(text("DELETE FROM student_recommendations WHERE student_id=:sid AND module_id=:cid"),
+                           {"sid": student_id, "cid": module_id})
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+
 # get student enrollments
 def get_student_enrollments(student_id):
     sql = text("""
@@ -401,6 +834,17 @@ def get_instructors_by_name(query: str) -> List[Dict[str, Any]]:
             OR CONCAT(u.first_name, ' ', u.last_name) LIKE :q
     """)
     rows = db.session.execute(sql, {"q": query_like}).all()
+    if not rows:
+        # no substring match: try typo-tolerant matching ("Prof Jonh")
+        ids = _fuzzy_instructor_ids(query)
+        if ids:
+            sql = text("""
+                SELECT i.instructor_id, u.first_name, u.last_name, i.department_code, i.title, i.office_location, i.office_hours
+                FROM instructors i
+                JOIN users u ON i.instructor_id = u.user_id
+                WHERE i.instructor_id IN :ids
+            """).bindparams(bindparam('ids', expanding=True))
+            rows = sorted(db.session.execute(sql, {"ids": ids}).all(), key=lambda r: ids.index(r.instructor_id))
     return [
         {
             "id": r.instructor_id,
@@ -0,0 +1,182 @@
+import re
+import time
+import threading
+import numpy as np
+from typing import Dict, Any, List, Iterable, Optional
+from .embedding_codec import unpack_embedding
+
+
+def module_level_from_id(module_id: str) -> int:
+    """Same rule as generate_vectors.py: first digit of the code * 1000 (INF2002 -> 2000)."""
+    match = re.search(r'\d', module_id or "")
+    return int(match.group()) * 1000 if match else 1000
+
+
+class ModuleVectorIndex:
+    """
+    In-process replacement for the Atlas $vectorSearch stage.
+    All module embeddings live in one contiguous float32 matrix (rows L2-normalised),
+    so a query is a single matrix-vector product followed by an argpartition top-k.
+    The term/level/instructor/major filters are precomputed boolean masks.
+    """
+
+    def __init__(self, module_ids: List[str], matrix: np.ndarray, terms: List, levels: List,
+                 instructors: List, majors: List[List[str]]):
+        self.module_ids = list(module_ids)
+        self._rows = {module_id: row for row, module_id in enumerate(self.module_ids)}
+        self.matrix = _normalise_rows(np.ascontiguousarray(matrix, dtype=np.float32))
+        self.built_at = time.time()
+
+        self._term_masks = _value_masks(terms)
+        self._level_masks = _value_masks(levels)
+        self._instructor_masks = _value_masks(instructors)
+        self._major_masks = _value_masks(majors, multi=True)
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[Dict[str, Any]]):
+        """Builds the index from 'modules' documents (as written by generate_vectors.py, any embedding format)."""
+        module_ids, vectors, terms, levels, instructors, majors = [], [], [], [], [], []
+        for doc in docs:
+            embedding = unpack_embedding(doc)
+            if embedding is None or embedding.size == 0:
+                continue
+            module_ids.append(doc['module_id'])
+            vectors.append(embedding)
+            terms.append(doc.get('academic_term'))
+            levels.append(doc.get('module_level') or module_level_from_id(doc['module_id']))
+            instructors.append(doc.get('instructor_name'))
+            majors.append(doc.get('target_majors') or [])
+
+        matrix = np.vstack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+        return cls(module_ids, matrix, terms, levels, instructors, majors)
+
+    def __len__(self):
+        return len(self.module_ids)
+
+    def mask_for_ids(self, module_ids: Iterable[str]) -> np.ndarray:
+        """Boolean mask selecting the given modules (used when filtering happens outside the index)."""
+        mask = np.zeros(len(self.module_ids), dtype=bool)
+        rows = [self._rows[m] for m in module_ids if m in self._rows]
+        mask[rows] = True
+        return mask
+
+    def filter_mask(self, term=None, level=None, instructor=None, student_major=None) -> Optional[np.ndarray]:
+        """ANDs the precomputed masks together. Returns None when no filter applies."""
+        masks = []
+        if term:
+            masks.append(self._term_masks.get(term))
+        if level:
+            try:
+                masks.append(self._level_masks.get(int(level)))
+            except ValueError: pass
+        if instructor:
+            masks.append(self._instructor_masks.get(instructor))
+        if student_major:
+            masks.append(self._major_masks.get(student_major))
+
+        if not masks:
+            return None
+        # an unknown filter value matches nothing
+        if any(m is None for m in masks):
+            return np.zeros(len(self.module_ids), dtype=bool)
+        combined = masks[0].copy()
+        for m in masks[1:]:
+            combined &= m
+        return combined
+
+    def search(self, query_vector, term=None, level=None, instructor=None, student_major=None,
+               limit: int = 10, mask: Optional[np.ndarray] = None, ann=None,
+               ann_exact_below: int = 20000) -> List[Dict[str, Any]]:
+        """
+        Returns [{'module_id', 'score'}] sorted by score, scored like Atlas cosine ((1 + cos) / 2).
+        With an `ann` index (IVFFlatIndex) the candidates come from its probed cells instead of a
+        full scan, unless the filters leave fewer than `ann_exact_below` modules to score exactly.
+        """
+        if not self.module_ids or limit <= 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        filter_mask = self.filter_mask(term, level, instructor, student_major)
+        if mask is not None:
+            filter_mask = mask if filter_mask is None else (filter_mask & mask)
+
+        if ann is not None and (filter_mask is None or np.count_nonzero(filter_mask) >= ann_exact_below):
+            allowed = None
+            if filter_mask is not None:
+                rows = self._rows
+                allowed = lambda module_id: module_id in rows and bool(filter_mask[rows[module_id]])
+            hits = ann.search(query, k=limit, allowed=allowed)
+            # a filter can leave the probed cells short of `limit`; the exact scan below covers that
+            if len(hits) == limit or filter_mask is None:
+                return [{"module_id": module_id, "score": (1.0 + cosine) / 2.0} for module_id, cosine in hits]
+
+        scores = self.matrix @ query
+
+        if filter_mask is not None:
+            candidates = np.flatnonzero(filter_mask)
+            if candidates.size == 0:
+                return []
+            scores = scores[candidates]
+        else:
+            candidates = None
+
+        k = min(limit, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k] if k < scores.shape[0] else np.arange(scores.shape[0])
+        top = top[np.argsort(-scores[top], kind='stable')]
+
+        rows = candidates[top] if candidates is not None else top
+        return [
+            {"module_id": self.module_ids[row], "score": float((1.0 + scores[i]) / 2.0)}
+            for row, i in zip(rows, top)
+        ]
+
+
+class CachedIndex:
+    """Lazily builds an index with `loader` and rebuilds it after `invalidate()` or `max_age` seconds."""
+
+    def __init__(self, loader, max_age: Optional[float] = None):
+        self._loader = loader
+        self._max_age = max_age
+        self._index = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        index = self._index
+        if index is not None and not self._expired(index):
+            return index
+        with self._lock:
+            if self._index is None or self._expired(self._index):
+                self._index = self._loader()
+            return self._index
+
+    def invalidate(self):
+        self._index = None
+
+    def _expired(self, index) -> bool:
+        return bool(self._max_age) and (time.time() - index.built_at) > self._max_age
+
+
+def _normalise_rows(matrix: np.ndarray) -> np.ndarray:
+    if matrix.size == 0:
+        return matrix
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _value_masks(values: List, multi: bool = False) -> Dict[Any, np.ndarray]:
+    """Maps each distinct value to a boolean mask over the rows that carry it."""
+    masks: Dict[Any, np.ndarray] = {}
+    n = len(values)
+    for row, value in enumerate(values):
+        for v in (value if multi else [value]):
+            if v is None:
+                continue
+            if v not in masks:
+                masks[v] = np.zeros(n, dtype=bool)
+            masks[v][row] = True
+    return masks
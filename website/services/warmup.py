@@ -0,0 +1,77 @@
+import threading
+import time
+import pymongo
+from flask import current_app
+from sqlalchemy import text
+from .. import db, mongo
+from . import embeddings
+
+# filled in by the background warm-up thread
+_warmup_state = {"started": False, "finished": False, "seconds": None, "error": None}
+_warmup_lock = threading.Lock()
+
+# database pings of the last readiness probe, reused for READINESS_CACHE_SECONDS
+_probe_cache = {"at": None, "databases": None}
+_probe_lock = threading.Lock()
+
+def start_background_warmup(app):
+    """Loads the encoder and opens both DB connections off the request path (PRELOAD_MODEL)."""
+    with _warmup_lock:
+        if _warmup_state["started"]:
+            return
+        _warmup_state["started"] = True
+    threading.Thread(target=_warm_up, args=(app,), name="model-warmup", daemon=True).start()
+
+def _warm_up(app):
+    started = time.perf_counter()
+    try:
+        with app.app_context():
+            # one dummy encode also initialises the torch thread pool
+            embeddings.get_model().encode("warm up")
+            ping_mongo()
+            ping_sql()
+    except Exception as e:
+        _warmup_state["error"] = str(e)
+        print(f"Warm-up failed: {e}")
+    _warmup_state["seconds"] = round(time.perf_counter() - started, 3)
+    _warmup_state["finished"] = True
+    print(f"Warm-up finished in {_warmup_state['seconds']}s.")
+
+def ping_mongo(timeout=None):
+    if timeout is None:
+        mongo.cx.admin.command('ping')
+        return
+    # also bounds server selection, which otherwise waits up to serverSelectionTimeoutMS (30 s)
+    with pymongo.timeout(timeout):
+        mongo.cx.admin.command('ping')
+
+def ping_sql():
+    db.session.execute(text("SELECT 1"))
+
+def _check(fn):
+    try:
+        fn()
+        return True
+    except Exception:
+        return False
+
+def _database_status():
+    # one probe pings at a time; the others reuse its result
+    with _probe_lock:
+        fresh = (_probe_cache["at"] is not None
+                 and time.monotonic() - _probe_cache["at"] < current_app.config.get('READINESS_CACHE_SECONDS', 5))
+        if not fresh:
+            timeout = current_app.config.get('READINESS_TIMEOUT_MS', 1500) / 1000
+            _probe_cache["databases"] = {"mongo": _check(lambda: ping_mongo(timeout)), "sql": _check(ping_sql)}
+            _probe_cache["at"] = time.monotonic()
+        return dict(_probe_cache["databases"])
+
+def readiness():
+    """Encoder state plus a ping of both databases (Mongo bounded by READINESS_TIMEOUT_MS, cached briefly)."""
+    status = {
+        "encoder_loaded": embeddings.is_model_loaded(),
+        **_database_status(),
+        "warmup": dict(_warmup_state),
+    }
+    status["ready"] = status["encoder_loaded"] and status["mongo"] and status["sql"]
+    return status